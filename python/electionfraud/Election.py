@@ -3,7 +3,7 @@
 import uuid
 
 from datetime import datetime
-from electionfraud import ElectionException
+from electionfraud.fraud import ElectionException
 
 class Election:
 
@@ -23,17 +23,17 @@ class Election:
         self.ballotbox = {}
         self.results = {}
         self._registration_deadline = deadline
-        self._polls_open, self.polls_closed = polls
-        self._absentee_open, self.absentee_closed = absentee
+        self._polls_open, self._polls_closed = polls
+        self._absentee_open, self._absentee_closed = absentee
 
-    def register_voter(voter):
+    def register_voter(self, voter):
         """
         Attempt to register a voter for this election.
         Raises an exception if the registration deadline has passed.
         """
-        if datetime.now() > self._registration_deadline:
+        if self._registration_deadline is not None and datetime.now() > self._registration_deadline:
             raise ElectionException('voter registration deadline has passed')
-        self.voters = self.voters | voter
+        self.voters.add(voter)
         self.ballotbox[voter] = None
 
     def vote_at_polling_place(self, voter, ballot):
@@ -72,16 +72,14 @@ class Election:
         """
         if voter not in self.voters:
             raise ElectionException('not a registered voter')
-        try:
-            _ = self.ballotbox[voter]
-        except KeyError:
-            self.ballotbox[voter] = (voter, ballot)
-        else:
+        if self.ballotbox.get(voter) is not None:
             raise ElectionException('that voter has already cast a ballot')
+        self.ballotbox[voter] = (voter, ballot)
 
-    def resolve(self):
+    def resolve(self, workers=None):
         """
-        Counts all the cast ballots, one question at a time.
+        Counts all the cast ballots, one question at a time, with
+        workers processes per question if given (see Question.resolve).
         """
         for q in self.questions:
-            self.results[q] = q.resolve(self.ballotbox))
+            self.results[q] = q.resolve(self.ballotbox, workers)
@@ -1,7 +1,11 @@
 # -*- python -*-
 
+import concurrent.futures
+import functools
 import uuid
 
+import electionfraud.responseformat.exception as rfx
+
 class Question:
 
     """
@@ -25,24 +29,90 @@ class Question:
         self.spoiled = []
         self.results = None
 
-    def resolve(self, ballotbox):
+    def responses(self, ballotbox):
+        """
+        Returns the responses to this question from the ballots cast,
+        in the order they are in the ballot box.  Voters who have not
+        cast a ballot, or did not answer this question, are skipped.
+        """
+        responses = []
+        for entry in ballotbox.values():
+            if entry is None:
+                continue
+            _, ballot = entry
+            if self in ballot:
+                responses.append(ballot[self])
+        return responses
+
+    def resolve(self, ballotbox, workers=None):
         """
         Checks each ballot in the ballot box to see if it is spoiled, i.e.
-        the terms of the response format were violated.  Valid ballots are 
+        the terms of the response format were violated.  Valid ballots are
         then counted according to the selected counting method.  Ballots are
         spoiled on a question-by-question basis, not in their entirety.
+
+        With workers, the responses are split into that many contiguous
+        shards, each validated by a worker process which keeps its
+        spoiled responses and, if the counting method provides
+        partial() and merge() (e.g. FirstPastThePost or any BordaBase),
+        tallies the rest.  Spoiled responses and partial tallies are
+        merged in shard order, so the results and the spoiled list are
+        the same as those of a serial resolve, in ballot box order.
+        Other counting methods count the valid responses in this
+        process, after validation.
         """
+        responses = self.responses(ballotbox)
+        self.spoiled = []
         self.countmethod.reset()
-        for voter in ballotbox.keys():
-            _, ballot = ballotbox[voter]
-            response = ballot[self]
-            try:
-                self.responseformat.validate(response)
-            except ElectionException as e:
-                self.spoil(response, e)
+        if not workers or workers == 1:
+            codes = self.responseformat.validate_batch(responses, self.choices)
+            for response, reason in _spoiled(self.responseformat, self.choices, responses, codes):
+                self.spoil(response, reason)
+            self.countmethod.count([x for x, code in zip(responses, codes) if not code])
+        else:
+            size = max(1, -(-len(responses) // workers))
+            bounds = [(x, x + size) for x in range(0, len(responses), size)]
+            mergeable = hasattr(self.countmethod, 'partial')
+            job = functools.partial(_resolve_shard, self.responseformat, self.choices, self.countmethod if mergeable else None)
+            # each worker is sent only its own shard
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                results = list(pool.map(job, [responses[start:stop] for start, stop in bounds]))
+            for _, spoiled in results:
+                for response, reason in spoiled:
+                    self.spoil(response, reason)
+            if mergeable:
+                self.countmethod.merge([partial for partial, _ in results])
             else:
-                self.countmethod.count(response)
-        self.results = self.countmethod.results()
+                self.countmethod.count([x for (start, stop), (codes, _) in zip(bounds, results) for x, code in zip(responses[start:stop], codes) if not code])
+        self.results = self.countmethod.results
+        return self.results
 
     def spoil(self, response, reason):
         self.spoiled.append((response, reason))
+
+
+def _spoiled(responseformat, field, responses, codes):
+    """
+    Returns a list of (response, exception) for the responses with a
+    nonzero reason code, in order.
+    """
+    spoiled = []
+    for response, code in zip(responses, codes):
+        if code:
+            try:
+                responseformat.validate(response, field)
+            except (rfx.ResponseException, TypeError, ValueError) as e:
+                spoiled.append((response, e))
+    return spoiled
+
+def _resolve_shard(responseformat, field, countmethod, responses):
+    """
+    Validates one shard of responses in a worker.  Returns a 2-tuple
+    of the partial tally of the valid responses (or, without a
+    counting method, their reason codes) and the spoiled responses.
+    """
+    codes = responseformat.validate_batch(responses, field)
+    spoiled = _spoiled(responseformat, field, responses, codes)
+    if countmethod is None:
+        return (codes, spoiled)
+    return (countmethod.partial([x for x, code in zip(responses, codes) if not code]), spoiled)
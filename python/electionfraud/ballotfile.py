@@ -0,0 +1,122 @@
+# -*- python -*-
+
+"""
+A compact binary file of ranked ballots, for counting the same ballots
+over and over (recounts, audits) without parsing them again.
+
+The file is a RankMatrix laid out on disk: a header, a table of
+candidate names, then the padded int16 array of ranked ids, the int16
+array of row lengths and the int64 array of weights, each starting on
+an 8 byte boundary, all little-endian:
+
+    magic      8 bytes, b'EFBALLOT'
+    version    uint16
+    width      uint16
+    choices    uint32, the number of candidate names
+    rows       uint64
+    weighted   uint8, then 7 bytes of padding
+    names      per candidate, a uint32 byte length then UTF-8 bytes
+
+load() memory-maps the file and hands back a RankMatrix whose arrays
+are memoryviews straight into the mapping, so loading costs the same
+however many ballots there are, and the operating system pages the
+ballots in as a count reads them.  Such a matrix is read-only.
+"""
+
+import array
+import mmap
+import struct
+import sys
+
+import electionfraud.ingest as ingest
+import electionfraud.rankmatrix as rankmatrix
+
+MAGIC = b'EFBALLOT'
+VERSION = 1
+
+_header = struct.Struct('<8sHHIQB7x')
+_length = struct.Struct('<I')
+
+def _padding(offset):
+    return -offset % 8
+
+def _write_array(f, a, typecode):
+    view = memoryview(a)
+    if sys.byteorder == 'big':
+        swapped = array.array(typecode, view)
+        swapped.byteswap()
+        view = memoryview(swapped)
+    f.write(view.cast('B'))
+    f.write(bytes(_padding(view.nbytes)))
+
+def dump(matrix, path):
+    """
+    Writes a RankMatrix to path.  Choices are written as str(choice),
+    so no two choices may have the same name.
+    """
+    if len(set(map(str, matrix.choices))) != len(matrix.choices):
+        raise ValueError('choices with the same name')
+    with open(path, 'wb') as f:
+        f.write(_header.pack(MAGIC, VERSION, matrix.width, len(matrix.choices), matrix.rows, matrix.weighted))
+        names = bytearray()
+        for choice in matrix.choices:
+            name = str(choice).encode('utf-8')
+            names += _length.pack(len(name)) + name
+        names += bytes(_padding(len(names)))
+        f.write(names)
+        _write_array(f, matrix.ranks, 'h')
+        _write_array(f, matrix.lengths, 'h')
+        _write_array(f, matrix.weights, 'q')
+
+def write(responses, path, width=None, choices=()):
+    """
+    Writes ranked ballots to path, by way of a RankMatrix.
+    """
+    dump(rankmatrix.RankMatrix.from_responses(responses, width, choices), path)
+
+def _read_array(buf, offset, count, typecode):
+    size = count * struct.calcsize(typecode)
+    view = buf[offset:offset + size]
+    if len(view) != size:
+        raise ValueError('truncated ballot file')
+    view = view.cast(typecode)
+    if sys.byteorder == 'big':
+        # no zero-copy view of little-endian data here
+        view = array.array(typecode, view)
+        view.byteswap()
+    return view, offset + size + _padding(size)
+
+def load(path, table=None):
+    """
+    Returns a read-only RankMatrix of the ballots in a ballot file,
+    backed by a memory map of it.  Candidate names are looked up in
+    table, an ingest.ChoiceTable or any {name: Choice} mapping, so that
+    they come back as the same Choices every time.
+    """
+    table = ingest.ChoiceTable() if table is None else table
+    with open(path, 'rb') as f:
+        if not f.read(1):
+            raise ValueError('empty ballot file')
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buf = memoryview(mapping)
+    if len(buf) < _header.size:
+        raise ValueError('truncated ballot file')
+    magic, version, width, nchoices, rows, weighted = _header.unpack_from(buf)
+    if magic != MAGIC:
+        raise ValueError('not a ballot file')
+    if version != VERSION:
+        raise ValueError('ballot file version %d, expected %d' % (version, VERSION))
+    offset = _header.size
+    choices = []
+    for _ in range(nchoices):
+        (n,) = _length.unpack_from(buf, offset)
+        offset += _length.size
+        choices.append(table[str(buf[offset:offset + n], 'utf-8')])
+        offset += n
+    offset += _padding(offset)
+    matrix = rankmatrix.RankMatrix(width, choices)
+    matrix.ranks, offset = _read_array(buf, offset, rows * width, 'h')
+    matrix.lengths, offset = _read_array(buf, offset, rows, 'h')
+    matrix.weights, offset = _read_array(buf, offset, rows, 'q')
+    matrix.weighted = bool(weighted)
+    return matrix
@@ -25,6 +25,14 @@ class AbstractCountMethod(metaclass=abc.ABCMeta):
         self.results = None
         self.residue = None
 
+    def reset(self):
+        """
+        Discards the results and residue of any previous count, so that
+        the next count starts afresh rather than adding to it.
+        """
+        self.results = None
+        self.residue = None
+
     @abc.abstractmethod
     def count(self, ballots):
         """
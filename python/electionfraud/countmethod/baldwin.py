@@ -1,6 +1,7 @@
 # -*- python -*-
 
 import abc
+import collections
 
 import electionfraud.countmethod.borda as borda
 import electionfraud.countmethod.mrx as mrx
@@ -15,16 +16,63 @@ class BaldwinBase(mrx.MultiRoundExhaustible, metaclass=abc.ABCMeta):
 
     Expected response format is Rank*InOrderOfPreference.
 
-    Might be more willing to implement this if there were some easily
-    accessible test data.  Also, the two sentences we have don't specify
-    which variant of the Borda count to use...
+    The two sentences we have don't specify which variant of the Borda
+    count to use, so there is one subclass per variant.  The ballots
+    are read once, into a borda.BordaScoreTable, and each elimination
+    adjusts the scores left in the table.
+
+    The residue is a list of the Borda scores of each round, as a
+    collections.Counter, with the last being identical to the results.
     """
-    def __init__(self):
-        raise NotImplemented()
 
     def count(self, responses):
+        mrx.MultiRoundExhaustible.count(self, self.score_table(responses))
+
+    @abc.abstractmethod
+    def score_table(self, responses):
+        """
+        Returns the borda.BordaScoreTable for the ballots.
+        """
         raise NotImplemented()
 
+    def count_round(self, rd, table):
+        this_round = collections.Counter(table.scores)
+        self.residue.append(this_round)
+        if len(this_round) < 2:
+            self.results = this_round
+            return None
+        last, _ = this_round.most_common()[-1]
+        table.eliminate(last)
+        return table
+
+    def interpret_result(self):
+        self.are_we_there_yet()
+        interpretation = 'Final round:\n'
+        for choice, points in self.results.items():
+            interpretation += '%s got %d points\n' % (choice, points)
+        return interpretation
+
+    def interpret_residue(self):
+        self.are_we_there_yet()
+        interpretation = ''
+        ctr = 1
+        for round in self.residue:
+            interpretation += 'Round %d:\n' % (ctr)
+            for choice, points in round.items():
+                interpretation += '%s got %d points\n' % (choice, points)
+            ctr += 1
+        return interpretation
+
+    def leader(self):
+        self.are_we_there_yet()
+        first, _ = self.results.most_common(1)[0]
+        return first
+
+    def trailer(self):
+        self.are_we_there_yet()
+        last, _ = self.residue[0].most_common()[-1]
+        return last
+
 
 class BaldwinTraditional(BaldwinBase):
 
@@ -32,8 +80,10 @@ class BaldwinTraditional(BaldwinBase):
         super().__init__()
         self.fieldsize = fieldsize
 
+    def score_table(self, responses):
+        return borda.TraditionalScoreTable.from_responses(responses, self.fieldsize)
+
 class BaldwinModified(BaldwinBase):
-    
-    def __init__(self):
-        super().__init__()
 
+    def score_table(self, responses):
+        return borda.ModifiedScoreTable.from_responses(responses)
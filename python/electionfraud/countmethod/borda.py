@@ -2,9 +2,15 @@
 
 import abc
 import collections
+import collections.abc
+import fractions
+import itertools
+import operator
 
 import electionfraud.countmethod.abc as cmabc
 import electionfraud.countmethod.exception as cmx
+import electionfraud.countmethod.mrx as mrx
+import electionfraud.rankmatrix as rankmatrix
 
 class BordaBase(cmabc.AbstractCountMethod, metaclass=abc.ABCMeta):
     """
@@ -20,26 +26,117 @@ class BordaBase(cmabc.AbstractCountMethod, metaclass=abc.ABCMeta):
 
     def __init__(self):
         super().__init__()
+        self._vectors = {}
 
     def count(self, responses):
+        if isinstance(responses, rankmatrix.RankMatrix):
+            self.merge([self.partial(responses)], responses.choices)
+        else:
+            self.merge([self.partial(responses)])
+
+    def partial(self, responses):
+        """
+        Returns a partial tally of some of the ballots, to be combined
+        with the partial tallies of the rest by merge().  This is a
+        Counter of {(choice, points): ballots}, i.e. how many ballots
+        awarded each choice so many points, which adds up exactly
+        however the ballots were split, and lists the choices in the
+        order they are first met.  Each ballot costs no more than
+        pairing it with its points vector.  The partial tally of a
+        RankMatrix is keyed by its interned ids, see tally_matrix().
+        """
+        if isinstance(responses, rankmatrix.RankMatrix):
+            return self.tally_matrix(responses)
+        vector = self.vector
+        return collections.Counter(itertools.chain.from_iterable(zip(x, vector(len(x))) for x in responses))
+
+    def tally_matrix(self, matrix):
+        """
+        partial() for a RankMatrix, a rank at a time: the ballots
+        ranking each id at a rank are counted straight off the column
+        of ids, and awarded that rank's points.  If the points depend
+        on the length of the ballot (beyond there being fewer ranks to
+        score), the column is counted by (id, length) instead.  A
+        weighted matrix is tallied a distinct ranking at a time.
+        """
+        vector = self.vector
+        pairs = collections.Counter()
+        if matrix.weighted:
+            for ids, weight in matrix.count_rows().items():
+                for pair in zip(ids, vector(len(ids))):
+                    pairs[pair] += weight
+            return pairs
+        lengths = set(matrix.lengths)
+        longest = vector(max(lengths, default=0))
+        if all(vector(x) == longest[:x] for x in lengths):
+            for rank, points in enumerate(longest):
+                for x, n in matrix.count_ids(rank).items():
+                    pairs[x, points] += n
+        else:
+            for rank in range(len(longest)):
+                cells = collections.Counter(zip(matrix.column(rank), matrix.lengths))
+                for (x, length), n in cells.items():
+                    if x != matrix.PAD:
+                        pairs[x, vector(length)[rank]] += n
+        # in the order the ids are first met, row by row
+        first = {x: operator.indexOf(matrix.ranks, x) for x, _ in pairs}
+        return collections.Counter({pair: pairs[pair] for pair in sorted(pairs, key=lambda pair: first[pair[0]])})
+
+    def merge(self, partials, choices=None):
+        """
+        Adds up partial tallies in the order given and scores them.
+        choices decodes partial tallies keyed by id.
+        """
+        pairs = collections.Counter()
+        for partial in partials:
+            pairs.update(partial)
         counter = collections.Counter()
-        for response in responses:
-            counter.update(self.transform(response))
+        for (choice, points), n in pairs.items():
+            if choices is not None:
+                choice = choices[choice]
+            counter[choice] += self.score(points, n)
         self.residue = counter.values()
-        self.result = counter
+        self.result = self.results = counter
 
     def are_we_there_yet(self):
         if self.results is None:
             raise cmx.IncompleteCount()
         
     @abc.abstractmethod
-    def transform(self, response):
+    def points(self, length):
         """
-        Every Borda method must define a ballot transformation that
-        turns a list of ranked choices into a dict of {choice: score}.
+        Every Borda method must define the points awarded to each rank
+        (starting from the top) of a ballot ranking length choices, as
+        a sequence of that length.
         """
         raise NotImplemented()
 
+    def vector(self, length):
+        """
+        points(length) as a tuple, worked out once per length.
+        """
+        try:
+            return self._vectors[length]
+        except KeyError:
+            self._vectors[length] = tuple(self.points(length))
+            return self._vectors[length]
+
+    def score(self, points, ballots):
+        """
+        Returns what so many ballots awarding a choice so many points
+        are worth, once tallied.  A method may tally something other
+        than the points themselves, e.g. a rank, and work out the
+        points here, only once the ballots have been added up.
+        """
+        return points * ballots
+
+    def transform(self, response):
+        """
+        Turns a list of ranked choices into a dict of {choice: score}.
+        """
+        score = self.score
+        return {choice: score(points, 1) for choice, points in zip(response, self.vector(len(response)))}
+
     def interpret_result(self):
         self.are_we_there_yet()
         interpretation = ''
@@ -77,27 +174,37 @@ class TraditionalBorda(BordaBase):
         super().__init__()
         self.fieldsize = fieldsize
 
-    def transform(self, response):
-        transformed = dict()
-        points = self.fieldsize - 1
-        for choice in response:
-            transformed[choice] = points
-            points -= 1
-        return transformed
+    def points(self, length):
+        return range(self.fieldsize - 1, self.fieldsize - 1 - length, -1)
         
 
 class NauruBorda(BordaBase):
     """
     Must be used with RankAllInOrderOfPreference.  Instead of integral
     numbers of points, the Nth-ranked choice is awarded 1/N points.
+
+    With exact=True, the ballots ranking each choice Nth are tallied
+    as an integer count for N, and each choice's total is only worked
+    out at the end, as a sum of Fractions.  Totals are then exact, and
+    the same to the last digit whether counted serially or in shards
+    and merged, at the cost of a few Fractions per choice rather than
+    any per ballot.  Otherwise the points are floats, and totals may
+    differ in the last place depending on how they were added up.
     """
-    def transform(self, response):
-        transformed = dict()
-        denominator = 1
-        for choice in response:
-            transformed[choice] = 1/denominator
-            denominator += 1
-        return transformed
+    def __init__(self, exact=False):
+        super().__init__()
+        self.exact = exact
+
+    def points(self, length):
+        if self.exact:
+            # the denominators, made into points by score()
+            return range(1, 1 + length)
+        return [1/x for x in range(1, 1 + length)]
+
+    def score(self, points, ballots):
+        if self.exact:
+            return fractions.Fraction(ballots, points)
+        return points * ballots
 
     def interpret_result(self):
         self.are_we_there_yet()
@@ -118,13 +225,8 @@ class KiribatiBorda(TraditionalBorda):
     the ballot, and down from there in increments of 1.  As such it
     needs to know the size of the field.
     """
-    def transform(self, response):
-        transformed = dict()
-        points = self.fieldsize
-        for choice in response:
-            transformed[choice] = points
-            points -= 1
-        return transformed
+    def points(self, length):
+        return range(self.fieldsize, self.fieldsize - length, -1)
 
 
 class ModifiedBorda(BordaBase):
@@ -135,11 +237,146 @@ class ModifiedBorda(BordaBase):
     the voter ranks only M<N of them, then the voter's choices are worth
     (M, M-1, ..., 2, 1) points.
     """
-    def transform(self, response):
-        transformed = dict()
-        points = len(self.response)
-        for choice in response:
-            transformed[choice] = points
-            points -= 1
-        return transformed
+    def points(self, length):
+        # keyed on the length of the ballot, unlike the others
+        return range(length, 0, -1)
+
+
+
+class BordaScoreTable(metaclass=abc.ABCMeta):
+    """
+    Borda scores that follow the elimination of choices, for methods
+    that eliminate on Borda scores round after round.
+
+    The scores start out as those of an ordinary Borda count, which
+    reads the ballots a rank at a time.  The ballots are also collapsed
+    into their distinct rankings, grouped by how many ballots each
+    stands for (those of a RankMatrix are kept as tuples of ids), and
+    indexed by the choices they rank.  A choice only loses points when
+    another is eliminated, and how many depends only on the ballots
+    ranking the two of them, so eliminating a choice reads only the
+    rankings that rank it, for the choices ranked on one side of it,
+    and adjusts their scores.  The pairs of choices are never all
+    counted up front; each elimination counts those of the loser only.
+    """
+
+    def __init__(self, responses):
+        if isinstance(responses, rankmatrix.RankMatrix):
+            histogram = responses.count_rows()
+            self.ids = responses.ids
+        else:
+            if isinstance(responses, mrx.RankingHistogram):
+                histogram = responses
+            else:
+                if not isinstance(responses, collections.abc.Sequence):
+                    responses = list(responses)
+                histogram = mrx.RankingHistogram.from_responses(responses)
+            self.ids = None
+        # {choice: {weight: [(ranking, position of choice)]}}
+        self.rankings = collections.defaultdict(lambda: collections.defaultdict(list))
+        for ranking, weight in histogram.items():
+            for i, x in enumerate(ranking):
+                self.rankings[x][weight].append((ranking, i))
+        if self.ids is not None:
+            self.ranked = responses.count_ids()
+        else:
+            self.ranked = collections.Counter()
+            for x, rows in self.rankings.items():
+                self.ranked[x] = sum(weight * len(hits) for weight, hits in rows.items())
+        borda = self.borda()
+        if responses is histogram:
+            vector = borda.vector
+            pairs = collections.Counter()
+            for ranking, weight in histogram.items():
+                for pair in zip(ranking, vector(len(ranking))):
+                    pairs[pair] += weight
+            borda.merge([pairs])
+        else:
+            borda.count(responses)
+        self.scores = borda.results
+
+    @classmethod
+    def from_responses(cls, responses, *args):
+        return cls(responses, *args)
+
+    @abc.abstractmethod
+    def borda(self):
+        """
+        Returns the BordaBase counting method that scores the ballots
+        before any eliminations.
+        """
+        raise NotImplemented()
+
+    @abc.abstractmethod
+    def forfeit(self, loser):
+        """
+        Returns a Counter of the points each choice still standing
+        loses when loser is eliminated, keyed as the rankings are.
+        """
+        raise NotImplemented()
+
+    def ranked_above(self, loser):
+        """
+        Returns a Counter of the ballots ranking each choice above
+        loser, keyed as the rankings are.
+        """
+        above = collections.Counter()
+        for weight, hits in self.rankings.get(loser, {}).items():
+            for x, n in collections.Counter(itertools.chain.from_iterable(x[:i] for x, i in hits)).items():
+                above[x] += n * weight
+        return above
+
+    def ranked_below(self, loser):
+        """
+        Returns a Counter of the ballots ranking each choice below
+        loser, keyed as the rankings are.
+        """
+        below = collections.Counter()
+        for weight, hits in self.rankings.get(loser, {}).items():
+            for x, n in collections.Counter(itertools.chain.from_iterable(x[i + 1:] for x, i in hits)).items():
+                below[x] += n * weight
+        return below
+
+    def eliminate(self, loser):
+        ids = self.ids
+        forfeit = self.forfeit(loser if ids is None else ids[loser])
+        del self.scores[loser]
+        for x in self.scores:
+            self.scores[x] -= forfeit[x if ids is None else ids[x]]
+
+
+class TraditionalScoreTable(BordaScoreTable):
+    """
+    Scores as TraditionalBorda does, in a field that shrinks by one
+    with each elimination.  A ranked choice scores the size of the
+    field, less one, less the number of choices ranked above it.
+    fieldsize defaults to the number of choices ranked on any ballot.
+    """
+
+    def __init__(self, responses, fieldsize=None):
+        self.fieldsize = fieldsize
+        super().__init__(responses)
+
+    def borda(self):
+        fieldsize = len(self.ranked) if self.fieldsize is None else self.fieldsize
+        return TraditionalBorda(fieldsize)
+
+    def forfeit(self, loser):
+        # the field shrinks, so every ballot ranking a choice is worth
+        # a point less, except those that ranked the loser above it
+        forfeit = collections.Counter(self.ranked)
+        forfeit.subtract(self.ranked_below(loser))
+        return forfeit
+
+
+class ModifiedScoreTable(BordaScoreTable):
+    """
+    Scores as ModifiedBorda does: a ranked choice scores one more than
+    the number of choices still ranked below it.
+    """
+
+    def borda(self):
+        return ModifiedBorda()
 
+    def forfeit(self, loser):
+        return self.ranked_above(loser)
@@ -1,7 +1,79 @@
 # -*- python -*-
 
+import collections
+import collections.abc
+import operator
+
+import electionfraud.rankmatrix as rankmatrix
+import electionfraud.stream as stream
 import electionfraud.countmethod.fptp as fptp
 import electionfraud.countmethod.irv as irv
+import electionfraud.countmethod.mrx as mrx
+
+
+class RunningTally:
+    """
+    The cumulative tally of a Bucklin count: add(rank) reads only the
+    choices ranked at that rank (starting from 0) on each ballot and
+    adds them to the tally of the ranks before it.
+
+    For each choice the earliest ballot ranking it so far, and at what
+    rank, is noted, so that each round's tally lists the choices in
+    the order a fresh count of the top ranks would first meet them,
+    and ties are broken the same way.  Ballots may be a list, a
+    stream.BallotStream, a RankingHistogram or a RankMatrix; any other
+    iterable is read into a list first, as it is read once per round.
+    """
+
+    def __init__(self, responses):
+        if isinstance(responses, rankmatrix.RankMatrix) and responses.weighted:
+            responses = mrx.RankingHistogram.from_matrix(responses)
+        elif not isinstance(responses, (collections.abc.Sequence, rankmatrix.RankMatrix, mrx.RankingHistogram, stream.BallotStream)):
+            responses = list(responses)
+        self.responses = responses
+        self.tally = collections.Counter()
+        self.seen = {}
+        self.ballots = None
+
+    def column(self, rank):
+        """
+        Returns a Counter of {choice: ballots} ranking it at this rank,
+        and a dict of {choice: position of the first ballot to do so}.
+        """
+        responses = self.responses
+        if isinstance(responses, rankmatrix.RankMatrix):
+            if rank >= responses.width:
+                return collections.Counter(), {}
+            cells = responses.column(rank)
+            counts = responses.tally(rank)
+            return counts, {x: operator.indexOf(cells, responses.ids[x]) for x in counts}
+        if isinstance(responses, mrx.RankingHistogram):
+            cells = [x[rank] if len(x) > rank else None for x in responses]
+            counts = collections.Counter()
+            for choice, weight in zip(cells, responses.values()):
+                if choice is not None:
+                    counts[choice] += weight
+        else:
+            cells = [x[rank] if len(x) > rank else None for x in responses]
+            counts = collections.Counter(cells)
+            counts.pop(None, None)
+        return counts, {x: cells.index(x) for x in counts}
+
+    def add(self, rank):
+        """
+        Adds the choices at this rank to the tally, and returns the
+        tally so far, in the order a fresh count would give.
+        """
+        counts, firsts = self.column(rank)
+        if self.ballots is None:
+            # only non-exhausted ballots rank anything first
+            self.ballots = sum(counts.values())
+        self.tally.update(counts)
+        seen = self.seen
+        for choice, position in firsts.items():
+            if choice not in seen or position < seen[choice][0]:
+                seen[choice] = (position, rank)
+        return collections.Counter({x: self.tally[x] for x in sorted(seen, key=seen.__getitem__)})
 
 class Bucklin(irv.InstantRunoffVoting):
     """
@@ -14,28 +86,55 @@ class Bucklin(irv.InstantRunoffVoting):
     Rather than eliminating candidates, this method expands the pool
     of votes to tally.  In the Nth round, the voter's top N
     preferences are all considered with equal weight.
+
+    Rather than recounting the top N preferences in the Nth round, a
+    RunningTally adds only the Nth preference of each ballot to the
+    tally of the rounds before, and each round's tally is kept in the
+    residue as before.  Each round makes one pass over the responses,
+    so they need not be held in memory if they can be iterated over
+    repeatedly, as a stream.BallotStream can.
     """
     
     def __init__(self):
         super().__init__()
-        
+
     def count(self, responses):
-        return self.count_bucklin(1, responses)
+        mrx.MultiRoundExhaustible.count(self, RunningTally(responses))
 
-    def count_bucklin(self, rd, responses):
-        this_round, half = self.bucklin_leaders(rd, responses)
+    def count_round(self, rd, running):
+        this_round = fptp.FirstPastThePost()
+        this_round.update(running.add(rd))
+        half = int(running.ballots / 2)
         self.residue.append(this_round.results)
         maybe_winner = this_round.leader()
         if this_round.results[maybe_winner] > half:
-            self.result = self.residue[-1]
-            return
-        self.count_bucklin(1 + rd, responses)
+            self.result = self.results = self.residue[-1]
+            return None
+        if rd and self.residue[-2] == this_round.results:
+            # every preference has been counted and still no majority
+            self.result = self.results = self.residue[-1]
+            return None
+        return running
         
     def bucklin_leaders(self, rd, responses):
-        non_exhausted_votes = [x for x in responses if len(x)]
-        half = int(len(non_exhausted_votes) / 2)
-        round_choices = [x[0:rd] for x in responses]
+        """
+        Counts the top rd preferences of every ballot from scratch,
+        as the rdth round of a Bucklin count.
+        """
+        tally = collections.Counter()
+        non_exhausted_votes = 0
+        if isinstance(responses, mrx.RankingHistogram):
+            for ranking, weight in responses.items():
+                if len(ranking):
+                    non_exhausted_votes += weight
+                    for choice in ranking[0:rd]:
+                        tally[choice] += weight
+        else:
+            for response in responses:
+                if len(response):
+                    non_exhausted_votes += 1
+                    tally.update(response[0:rd])
         counter = fptp.FirstPastThePost()
-        counter.count(round_choices)
-        return (counter, half)
+        counter.update(tally)
+        return (counter, int(non_exhausted_votes / 2))
 
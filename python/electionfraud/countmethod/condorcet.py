@@ -0,0 +1,385 @@
+# -*- python -*-
+
+import abc
+import collections
+import itertools
+
+import electionfraud.countmethod.abc as cmabc
+import electionfraud.countmethod.exception as cmx
+import electionfraud.countmethod.mrx as mrx
+import electionfraud.rankmatrix as rankmatrix
+
+class PairwiseMatrix:
+    """
+    http://en.wikipedia.org/wiki/Condorcet_method
+
+    Tallies, for every pair of choices, how many voters prefer one to
+    the other.  On a ranked ballot a choice is preferred to every
+    choice ranked below it and to every unranked choice; a pairwise
+    ballot (as validated by responseformat.pair.Pairwise) states its
+    preferences outright.
+
+    Ranked ballots are collapsed into distinct rankings before their
+    pairs are counted, and unranked choices are accounted for by
+    counting how often each choice is ranked at all, so the tally
+    never visits a pair that no ballot ranked.  Once the ballots are
+    in, everything else depends only on the number of choices.
+
+    Two matrices are merged by adding up their tallies, so shards or
+    precincts may be tallied separately.
+    """
+
+    def __init__(self, choices=()):
+        self.choices = []
+        self.ids = {}
+        self.ranked = collections.Counter()
+        self.pairs = collections.Counter()
+        self.stated = collections.Counter()
+        for choice in choices:
+            self.intern(choice)
+
+    def intern(self, choice):
+        try:
+            return self.ids[choice]
+        except KeyError:
+            self.ids[choice] = len(self.choices)
+            self.choices.append(choice)
+            return self.ids[choice]
+
+    def add_rankings(self, responses):
+        """
+        Adds ranked ballots: lists of choices, a RankMatrix or a
+        RankingHistogram.
+        """
+        if isinstance(responses, rankmatrix.RankMatrix):
+            rankings = mrx.RankingHistogram.from_matrix(responses)
+        elif isinstance(responses, mrx.RankingHistogram):
+            rankings = responses
+        else:
+            rankings = mrx.RankingHistogram.from_responses(responses)
+        # rankings standing for the same number of ballots have their
+        # pairs counted together, by itertools and Counter, in C
+        by_weight = collections.defaultdict(list)
+        for ranking, weight in rankings.items():
+            by_weight[weight].append(tuple(self.intern(x) for x in ranking))
+        for weight, rows in by_weight.items():
+            ranked = collections.Counter(itertools.chain.from_iterable(rows))
+            pairs = collections.Counter(itertools.chain.from_iterable(map(itertools.combinations, rows, itertools.repeat(2))))
+            for i, n in ranked.items():
+                self.ranked[i] += n * weight
+            for ij, n in pairs.items():
+                self.pairs[ij] += n * weight
+
+    def add_pairs(self, responses):
+        """
+        Adds pairwise ballots: lists of (preferred, other) tuples.
+        """
+        for (x, y), n in collections.Counter(itertools.chain.from_iterable(responses)).items():
+            self.stated[self.intern(x), self.intern(y)] += n
+
+    def merge(self, other):
+        """
+        Adds the tallies of another matrix to this one.
+        """
+        ids = [self.intern(x) for x in other.choices]
+        for i, n in other.ranked.items():
+            self.ranked[ids[i]] += n
+        for (i, j), n in other.pairs.items():
+            self.pairs[ids[i], ids[j]] += n
+        for (i, j), n in other.stated.items():
+            self.stated[ids[i], ids[j]] += n
+        return self
+
+    def preferences(self):
+        """
+        Returns the matrix as a list of rows, where [i][j] is the
+        number of voters preferring choices[i] to choices[j].
+        """
+        n = len(self.choices)
+        d = [[self.ranked[i]] * n for i in range(n)]
+        for (i, j), w in self.pairs.items():
+            # ballots ranking both i and j, with i above j, only count
+            # once for i over j, not also as j ranked over unranked i
+            d[j][i] -= w
+        for (i, j), w in self.stated.items():
+            d[i][j] += w
+        for i in range(n):
+            d[i][i] = 0
+        return d
+
+    def condorcet_winner(self):
+        """
+        Returns the choice that beats every other choice head to head,
+        or None if there is no such choice.
+        """
+        d = self.preferences()
+        for i in range(len(d)):
+            if all(d[i][j] > d[j][i] for j in range(len(d)) if j != i):
+                return self.choices[i]
+        return None
+
+    def wins(self):
+        """
+        Returns a Counter of how many other choices each choice beats
+        head to head.
+        """
+        d = self.preferences()
+        n = len(d)
+        return collections.Counter({self.choices[i]: sum(1 for j in range(n) if d[i][j] > d[j][i]) for i in range(n)})
+
+    def copeland(self):
+        """
+        Returns a Counter of each choice's head to head wins minus its
+        head to head losses.
+        """
+        d = self.preferences()
+        n = len(d)
+        scores = collections.Counter()
+        for i in range(n):
+            scores[self.choices[i]] = sum((d[i][j] > d[j][i]) - (d[i][j] < d[j][i]) for j in range(n))
+        return scores
+
+    def schulze(self):
+        """
+        http://en.wikipedia.org/wiki/Schulze_method
+
+        Returns a 2-tuple of the strongest path strengths between every
+        pair of choices, found Floyd-Warshall style, and the choices in
+        order of finish.
+        """
+        d = self.preferences()
+        n = len(d)
+        p = [[d[i][j] if d[i][j] > d[j][i] else 0 for j in range(n)] for i in range(n)]
+        for k in range(n):
+            pk = p[k]
+            for i in range(n):
+                pi = p[i]
+                pik = pi[k]
+                if i == k or not pik:
+                    continue
+                for j in range(n):
+                    if j != i and j != k:
+                        width = pik if pik < pk[j] else pk[j]
+                        if width > pi[j]:
+                            pi[j] = width
+        beaten = [sum(1 for j in range(n) if p[i][j] > p[j][i]) for i in range(n)]
+        order = sorted(range(n), key=lambda i: -beaten[i])
+        return (p, [self.choices[i] for i in order])
+
+    def ranked_pairs(self):
+        """
+        http://en.wikipedia.org/wiki/Ranked_pairs
+
+        Returns a 2-tuple of the pairs that were locked in, strongest
+        majority first, and the choices in order of finish.
+        """
+        d = self.preferences()
+        n = len(d)
+        majorities = [(i, j) for i in range(n) for j in range(n) if d[i][j] > d[j][i]]
+        majorities.sort(key=lambda x: (-d[x[0]][x[1]], d[x[1]][x[0]]))
+        beats = [set() for i in range(n)]
+        locked = []
+        for i, j in majorities:
+            if not self._reaches(beats, j, i):
+                beats[i].add(j)
+                locked.append((self.choices[i], self.choices[j]))
+        order = []
+        remaining = set(range(n))
+        while remaining:
+            beaten = set().union(*(beats[i] for i in remaining))
+            top = min(remaining - beaten)
+            order.append(self.choices[top])
+            remaining.remove(top)
+        return (locked, order)
+
+    def _reaches(self, beats, start, goal):
+        seen = set()
+        frontier = [start]
+        while frontier:
+            i = frontier.pop()
+            if i == goal:
+                return True
+            if i not in seen:
+                seen.add(i)
+                frontier.extend(beats[i])
+        return False
+
+
+class PairwiseBase(cmabc.AbstractCountMethod, metaclass=abc.ABCMeta):
+    """
+    Counting methods that decide the result from a PairwiseMatrix.
+    The residue is the PairwiseMatrix itself.  count() takes ranked
+    ballots; count_pairs() takes pairwise ballots.
+    """
+
+    def __init__(self):
+        self.results = None
+        self.residue = None
+
+    def count(self, responses):
+        matrix = PairwiseMatrix(responses.choices if isinstance(responses, rankmatrix.RankMatrix) else ())
+        matrix.add_rankings(responses)
+        self.tabulate(matrix)
+
+    def count_pairs(self, responses):
+        matrix = PairwiseMatrix()
+        matrix.add_pairs(responses)
+        self.tabulate(matrix)
+
+    def partial(self, responses):
+        """
+        Returns the PairwiseMatrix of some of the ranked ballots, to be
+        combined with those of the rest by merge().  The matrix of a
+        RankMatrix lists its choices in the same order, i.e. by id.
+        """
+        matrix = PairwiseMatrix(responses.choices if isinstance(responses, rankmatrix.RankMatrix) else ())
+        matrix.add_rankings(responses)
+        return matrix
+
+    def merge(self, partials, choices=None):
+        """
+        Adds up partial matrices in the order given and decides the
+        result.  choices, if given, replaces the choices of partial
+        matrices taken from a RankMatrix, e.g. after they have been
+        copied between processes.
+        """
+        matrix = PairwiseMatrix(() if choices is None else choices)
+        for partial in partials:
+            if choices is not None:
+                partial.choices = choices[0:len(partial.choices)]
+            matrix.merge(partial)
+        self.tabulate(matrix)
+
+    @abc.abstractmethod
+    def tabulate(self, matrix):
+        """
+        Decides the results from a complete PairwiseMatrix.
+        """
+        raise NotImplemented()
+
+    def are_we_there_yet(self):
+        if self.results is None:
+            raise cmx.IncompleteCount()
+
+    def interpret_residue(self):
+        self.are_we_there_yet()
+        d = self.residue.preferences()
+        interpretation = ''
+        for i, x in enumerate(self.residue.choices):
+            for j, y in enumerate(self.residue.choices):
+                if d[i][j] > d[j][i]:
+                    interpretation += '%s beat %s %d to %d\n' % (x, y, d[i][j], d[j][i])
+        return interpretation
+
+
+class Condorcet(PairwiseBase):
+    """
+    The choice that beats every other choice head to head wins.  There
+    may not be one, in which case leader() returns None.
+
+    Results are stored as a collections.Counter of how many other
+    choices each choice beats head to head.
+    """
+
+    def tabulate(self, matrix):
+        self.residue = matrix
+        self.results = matrix.wins()
+
+    def interpret_result(self):
+        self.are_we_there_yet()
+        winner = self.leader()
+        if winner is None:
+            return 'no Condorcet winner\n'
+        return '%s is the Condorcet winner\n' % (winner)
+
+    def leader(self):
+        self.are_we_there_yet()
+        return self.residue.condorcet_winner()
+
+    def trailer(self):
+        self.are_we_there_yet()
+        d = self.residue.preferences()
+        for i, choice in enumerate(self.residue.choices):
+            if all(d[j][i] > d[i][j] for j in range(len(d)) if j != i):
+                return choice
+        return None
+
+
+class Copeland(PairwiseBase):
+    """
+    http://en.wikipedia.org/wiki/Copeland%27s_method
+
+    Each choice scores its head to head wins minus its head to head
+    losses.  Results are stored as a collections.Counter of scores.
+    """
+
+    def tabulate(self, matrix):
+        self.residue = matrix
+        self.results = matrix.copeland()
+
+    def interpret_result(self):
+        self.are_we_there_yet()
+        interpretation = ''
+        for choice, score in self.results.most_common():
+            interpretation += '%s scored %d\n' % (choice, score)
+        return interpretation
+
+    def leader(self):
+        self.are_we_there_yet()
+        first, _ = self.results.most_common(1)[0]
+        return first
+
+    def trailer(self):
+        self.are_we_there_yet()
+        last, _ = self.results.most_common()[-1]
+        return last
+
+
+class OrderedPairwiseBase(PairwiseBase):
+    """
+    Pairwise methods whose results are a list of the choices in order
+    of finish, winner first.
+    """
+
+    def interpret_result(self):
+        self.are_we_there_yet()
+        interpretation = ''
+        for place, choice in enumerate(self.results):
+            interpretation += '%d. %s\n' % (1 + place, choice)
+        return interpretation
+
+    def leader(self):
+        self.are_we_there_yet()
+        return self.results[0]
+
+    def trailer(self):
+        self.are_we_there_yet()
+        return self.results[-1]
+
+
+class Schulze(OrderedPairwiseBase):
+    """
+    http://en.wikipedia.org/wiki/Schulze_method
+
+    Ranks the choices by the strength of the strongest paths of head
+    to head wins between them.  The path strengths are kept in the
+    paths attribute.
+    """
+
+    def tabulate(self, matrix):
+        self.residue = matrix
+        self.paths, self.results = matrix.schulze()
+
+
+class RankedPairs(OrderedPairwiseBase):
+    """
+    http://en.wikipedia.org/wiki/Ranked_pairs
+
+    Locks in head to head wins from the strongest majority down,
+    skipping any that would create a cycle.  The pairs locked in are
+    kept in the locked attribute.
+    """
+
+    def tabulate(self, matrix):
+        self.residue = matrix
+        self.locked, self.results = matrix.ranked_pairs()
@@ -1,9 +1,18 @@
 # -*- python -*-
 
+import collections
+import collections.abc
+import itertools
+
 import logging
 logging.basicConfig(level=logging.WARNING)
 
+import electionfraud.rankmatrix as rankmatrix
+import electionfraud.stream as stream
+import electionfraud.countmethod.fptp as fptp
 import electionfraud.countmethod.irv as irv
+import electionfraud.countmethod.mrx as mrx
+import electionfraud.countmethod.parallel as parallel
 
 class ContingentVote(irv.InstantRunoffVoting):
     """
@@ -18,26 +27,121 @@ class ContingentVote(irv.InstantRunoffVoting):
     to be no longer than 2.  Each round is an instance of FirstPastThePost.
 
     The result is simply the last round in the residue.
+
+    The run-off is not a recount.  The top two keep their first round
+    tallies, and only the ballots whose first choice was eliminated
+    are read any further, by transfer(), for the leader they rank
+    highest.  With workers, the transfers from a RankMatrix are
+    tallied in shards across that many processes and merged.
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, aggregate=False, workers=None):
+        super().__init__(aggregate)
+        self.workers = workers
         self.logger = logging.getLogger(__name__)
 
+    def count(self, responses):
+        # the first round and the run-off each read the ballots, so a
+        # one-shot iterable is read into a list first
+        if not isinstance(responses, (collections.abc.Sequence, rankmatrix.RankMatrix, mrx.RankingHistogram, stream.BallotStream)):
+            responses = list(responses)
+        super().count(responses)
+
     def requalify(self, response, leaders):
         """
         Returns a modified ballot that preserves only the leaders.
         """
         return [x for x in response if x in leaders]
 
-    def count(self, responses):
+    def requalify_all(self, responses, leaders):
+        """
+        Returns the ballots for the run-off, preserving only the leaders.
+        The count itself only transfers the ballots that do not already
+        count for a leader; this rewrites every ballot, for a recount of
+        the run-off from scratch.
+        """
+        if isinstance(responses, mrx.RankingHistogram):
+            return responses.requalify(leaders)
+        return [self.requalify(x, leaders) for x in responses]
+
+    def transfer(self, responses, leaders, start=0):
+        """
+        Tallies the run-off transfers of some ballots: each ballot whose
+        first choice is not one of the leaders counts for whichever
+        leader it ranks highest, if any.  Ballots that already count
+        for a leader are not read past their first choice.
+
+        Returns a 2-tuple of a Counter of {leader: ballots transferred}
+        and a dict of {leader: position of the first ballot counting
+        for that leader in the run-off, either way}, numbering the
+        ballots from start.  Shards of the ballots may be tallied
+        separately, each numbered from its own offset, and added up by
+        merge_transfers().  The ballots are read once, in order, so a
+        stream will do.
+        """
+        if isinstance(responses, rankmatrix.RankMatrix):
+            # rows of ids, padded, which the padding never matches
+            rankings = zip(*(responses.column(x) for x in range(responses.width)))
+            weights = responses.weights if responses.weighted else itertools.repeat(1)
+            leaders = {responses.ids[x]: x for x in leaders if x in responses.ids}
+        else:
+            rankings = responses
+            weights = responses.values() if isinstance(responses, mrx.RankingHistogram) else itertools.repeat(1)
+            leaders = {x: x for x in leaders}
+        transfers = collections.Counter()
+        firsts = {}
+        for position, (ranking, weight) in enumerate(zip(rankings, weights), start):
+            if not len(ranking):
+                continue
+            if ranking[0] in leaders:
+                firsts.setdefault(leaders[ranking[0]], position)
+                continue
+            for x in ranking[1:]:
+                if x in leaders:
+                    leader = leaders[x]
+                    transfers[leader] += weight
+                    firsts.setdefault(leader, position)
+                    break
+        return (transfers, firsts)
+
+    def merge_transfers(self, partials):
+        """
+        Adds up the results of transfer() for shards of the ballots.
+        """
+        transfers = collections.Counter()
+        firsts = {}
+        for partial, partial_firsts in partials:
+            transfers.update(partial)
+            for leader, position in partial_firsts.items():
+                if position < firsts.get(leader, position + 1):
+                    firsts[leader] = position
+        return (transfers, firsts)
+
+    def runoff(self, responses, first_round, leaders):
+        """
+        Returns the run-off tally, in the order a recount of the
+        requalified ballots would give: by the first ballot counting
+        for each leader.
+        """
+        if self.workers and self.workers > 1 and isinstance(responses, rankmatrix.RankMatrix):
+            transfers, firsts = parallel.transfer(self, responses, leaders, self.workers)
+        else:
+            transfers, firsts = self.transfer(responses, leaders)
+        order = sorted((x for x in leaders if x in firsts), key=firsts.__getitem__)
+        return collections.Counter({x: first_round[x] + transfers[x] for x in order})
+
+    def count_round(self, rd, responses):
         this_round, half = self.count_leaders(responses)
         self.logger.debug(this_round.results.most_common())
         self.residue.append(this_round.results)
         maybe_winner = this_round.leader()
         if this_round.results[maybe_winner] > half:
             self.results = self.residue[-1]
-            return
+            return None
         leaders = [x for x,y in this_round.results.most_common(2)]
-        next_round = [self.requalify(x, leaders) for x in responses]
-        self.count(next_round)
+        runoff = fptp.FirstPastThePost()
+        runoff.update(self.runoff(responses, this_round.results, leaders))
+        self.logger.debug(runoff.results.most_common())
+        self.residue.append(runoff.results)
+        self.results = self.residue[-1]
+        return None
@@ -3,7 +3,9 @@
 import logging
 logging.basicConfig(level=logging.WARNING)
 
+import electionfraud.countmethod.fptp as fptp
 import electionfraud.countmethod.irv as irv
+import electionfraud.countmethod.mrx as mrx
 
 class CoombsMethod(irv.InstantRunoffVoting):
     """
@@ -16,15 +18,35 @@ class CoombsMethod(irv.InstantRunoffVoting):
     Because this method requires keeping track of both first-place and 
     last-place results, the result is a 2-tuple containing the first-place
     and last-place results, and the residue is the record of rounds.
+
+    The ballots are dealt, in a single pass, onto two sets of
+    BallotPiles sharing the same ballots: one by first continuing
+    preference and one, read backwards, by last.  Eliminating a choice
+    only moves the ballots on its two piles, so both tallies are kept
+    up to date without ever copying or reversing a ballot.
     """
-    def __init__(self):
-        super().__init__()
+    def __init__(self, aggregate=False):
+        super().__init__(aggregate)
         self.logger = logging.getLogger(__name__)
 
     def count(self, responses):
+        if self.aggregate and not isinstance(responses, mrx.RankingHistogram):
+            responses = mrx.RankingHistogram.from_responses(responses)
+        front = mrx.BallotPiles.from_responses(responses, deal=False)
+        back = mrx.BallotPiles(front.ballots, front.weights, reverse=True, deal=False)
+        for i in range(len(front.ballots)):
+            front.deal(i)
+            back.deal(i)
+        mrx.MultiRoundExhaustible.count(self, (front, back))
+
+    def count_round(self, rd, piles):
         self.logger.debug('new round')
-        firstplace, half = self.count_leaders(responses)
-        lastplace, _ = self.count_trailers(responses)
+        front, back = piles
+        firstplace = fptp.FirstPastThePost()
+        firstplace.update(front.tally())
+        half = int(firstplace.residue / 2)
+        lastplace = fptp.FirstPastThePost()
+        lastplace.update(back.tally())
         self.logger.debug('leaders')
         self.logger.debug(firstplace.results.most_common())
         self.logger.debug('trailers')
@@ -34,17 +56,24 @@ class CoombsMethod(irv.InstantRunoffVoting):
         self.residue.append((firstplace.results, lastplace.results))
         if firstplace.results[maybe_winner] > half:
             self.results = self.residue[-1]
-            return
-        next_round = [self.disqualify(x, maybe_loser) for x in responses]
-        self.count(next_round)
+            return None
+        front.eliminate(maybe_loser)
+        back.eliminate(maybe_loser)
+        return piles
 
     def count_trailers(self, responses):
-        sesnopser = []
-        for response in responses:
-            esnopser = response.copy()
-            esnopser.reverse()
-            sesnopser.append(esnopser)
-        return self.count_leaders(sesnopser)
+        """
+        As count_leaders(), for the last choices of the ballots.  The
+        count itself keeps the last choices on piles; this recounts
+        them from scratch, as an audit of a round.
+        """
+        if isinstance(responses, mrx.RankingHistogram):
+            counter = fptp.FirstPastThePost()
+            counter.update(responses.trailers())
+            return (counter, int(counter.residue / 2))
+        counter = fptp.FirstPastThePost()
+        counter.count([x[-1]] for x in responses if len(x))
+        return (counter, int(counter.residue / 2))
 
     def interpret_result(self):
         self.are_we_there_yet()
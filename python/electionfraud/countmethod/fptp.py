@@ -1,9 +1,11 @@
 # -*- python -*-
 
 import collections
+import itertools
 
 import electionfraud.countmethod.abc as efcmabc
 import electionfraud.countmethod.exception as efcmx
+import electionfraud.rankmatrix as rankmatrix
 
 class FirstPastThePost(efcmabc.AbstractCountMethod):
     """
@@ -15,7 +17,11 @@ class FirstPastThePost(efcmabc.AbstractCountMethod):
     of choices.  Protocols for reducing the set of choices are beyond
     the scope of this counting method.
 
-    Results are stored as a collections.Counter object.
+    Results are stored as a collections.Counter object.  Responses are
+    consumed in a single pass, so any iterable will do, including a
+    generator of ballots read from disk.  A RankMatrix may be counted
+    directly, in which case every ranked choice on every ballot gets a
+    vote.
 
     The residue is simply the number of votes counted.
     """
@@ -23,13 +29,54 @@ class FirstPastThePost(efcmabc.AbstractCountMethod):
         self.residue = 0
         self.results = None
         self._counter = collections.Counter()
+
+    def reset(self):
+        self.residue = 0
+        self.results = None
+        self._counter = collections.Counter()
     
     def count(self, responses):
-        for response in responses:
-            self._counter.update(response)
+        if isinstance(responses, rankmatrix.RankMatrix):
+            self.merge([self.partial(responses)], responses.choices)
+            return
+        self._counter.update(itertools.chain.from_iterable(responses))
         self.results = self._counter
         self.residue = sum(self._counter.values())
 
+    def update(self, tally):
+        """
+        Adds a tally that has already been aggregated elsewhere, i.e. a
+        mapping of {choice: votes}, to the count.  Choices not seen
+        before are appended in the order the mapping presents them.
+        """
+        self._counter.update(tally)
+        self.results = self._counter
+        self.residue = sum(self._counter.values())
+
+    def partial(self, responses):
+        """
+        Returns a partial tally of some of the ballots, as a Counter,
+        to be combined with the partial tallies of the rest by merge().
+        The partial tally of a RankMatrix is keyed by its interned ids,
+        which keeps it small when it is sent between processes.
+        """
+        if isinstance(responses, rankmatrix.RankMatrix):
+            return responses.count_ids()
+        return collections.Counter(itertools.chain.from_iterable(responses))
+
+    def merge(self, partials, choices=None):
+        """
+        Adds partial tallies to the count in the order given, which
+        makes the result independent of the order in which they were
+        computed.  choices decodes partial tallies keyed by id.
+        """
+        tally = collections.Counter()
+        for partial in partials:
+            tally.update(partial)
+        if choices is not None:
+            tally = collections.Counter({choices[x]: n for x, n in tally.items()})
+        self.update(tally)
+
     def are_we_there_yet(self):
         if self.results is None:
             raise efcmx.IncompleteCount('nobody past the post yet')
@@ -4,6 +4,7 @@ import logging
 logging.basicConfig(level=logging.WARNING)
 
 import electionfraud.countmethod.exception as efcmx
+import electionfraud.countmethod.fptp as fptp
 import electionfraud.countmethod.mrx as mrx
 
 class InstantRunoffVoting(mrx.MultiRoundExhaustible):
@@ -16,23 +17,33 @@ class InstantRunoffVoting(mrx.MultiRoundExhaustible):
     fewest votes is eliminated, and the ballots that listed the
     eliminated choice as their highest preference are recounted in the
     next round as if that eliminated choice were not available.  
+
+    With aggregate=True, identical rankings are first collapsed into a
+    RankingHistogram, so that the work done in each round depends on
+    the number of distinct rankings rather than the number of ballots.
+    The residue is the same either way.
     """
 
-    def __init__(self):
+    def __init__(self, aggregate=False):
         super().__init__()
+        self.aggregate = aggregate
         self.logger = logging.getLogger(__name__)
 
     def count(self, responses):
+        if self.aggregate and not isinstance(responses, mrx.RankingHistogram):
+            responses = mrx.RankingHistogram.from_responses(responses)
+        super().count(responses)
+
+    def count_round(self, rd, responses):
         this_round, half = self.count_leaders(responses)
         self.logger.debug(this_round.results.most_common())
         self.residue.append(this_round.results)
         maybe_winner = this_round.leader()
         if this_round.results[maybe_winner] > half:
             self.results = self.residue[-1]
-            return
+            return None
         loser = this_round.trailer()
-        next_round = [self.disqualify(x, loser) for x in responses]
-        self.count(next_round)
+        return self.disqualify_all(responses, loser)
         
     def interpret_residue(self):
         self.are_we_there_yet()
@@ -48,3 +59,31 @@ class InstantRunoffVoting(mrx.MultiRoundExhaustible):
 
     def trailer(self):
         self.are_we_there_yet()
+
+
+class IncrementalInstantRunoffVoting(InstantRunoffVoting):
+    """
+    Counts exactly as InstantRunoffVoting does, round for round, but
+    keeps the ballots in BallotPiles.  Rather than recounting every
+    ballot's first choice each round, only the ballots counting for
+    the eliminated choice are looked at again, and the tallies are
+    updated in place.
+    """
+
+    def count(self, responses):
+        if self.aggregate and not isinstance(responses, mrx.RankingHistogram):
+            responses = mrx.RankingHistogram.from_responses(responses)
+        mrx.MultiRoundExhaustible.count(self, mrx.BallotPiles.from_responses(responses))
+
+    def count_round(self, rd, piles):
+        this_round = fptp.FirstPastThePost()
+        this_round.update(piles.tally())
+        half = int(this_round.residue / 2)
+        self.logger.debug(this_round.results.most_common())
+        self.residue.append(this_round.results)
+        maybe_winner = this_round.leader()
+        if this_round.results[maybe_winner] > half:
+            self.results = self.residue[-1]
+            return None
+        piles.eliminate(this_round.trailer())
+        return piles
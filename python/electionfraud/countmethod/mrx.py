@@ -1,8 +1,229 @@
 # -*- python -*-
 
+import array
+import collections
+import collections.abc
+
 import electionfraud.countmethod.abc as efcmabc
 import electionfraud.countmethod.exception as efcmx
 import electionfraud.countmethod.fptp as fptp
+import electionfraud.rankmatrix as rankmatrix
+
+class RankingHistogram(collections.Counter):
+    """
+    Identical rankings collapsed into a single entry, i.e. a mapping of
+    {ranking: number of ballots}, where each ranking is a tuple of
+    choices.  Entries keep the order in which each ranking was first
+    seen, so that ties are broken exactly as they would be when
+    counting the original list of ballots.
+    """
+
+    @classmethod
+    def from_responses(cls, responses):
+        if isinstance(responses, rankmatrix.RankMatrix):
+            return cls.from_matrix(responses)
+        return cls(tuple(x) for x in responses)
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        histogram = cls()
+        for ids, weight in matrix.count_rows().items():
+            histogram[tuple(matrix.decode(ids))] = weight
+        return histogram
+
+    def leaders(self):
+        """
+        Returns a Counter of the first choices of all non-exhausted
+        rankings, weighted by the number of ballots.
+        """
+        leaders = collections.Counter()
+        for ranking, weight in self.items():
+            if ranking:
+                leaders[ranking[0]] += weight
+        return leaders
+
+    def trailers(self):
+        """
+        Returns a Counter of the last choices of all non-exhausted
+        rankings, weighted by the number of ballots, for a recount of
+        the trailers of a round from scratch.
+        """
+        trailers = collections.Counter()
+        for ranking, weight in self.items():
+            if ranking:
+                trailers[ranking[-1]] += weight
+        return trailers
+
+    def disqualify(self, loser):
+        """
+        Returns a new histogram with an eliminated choice removed from
+        every ranking.  Rankings that become identical are merged, and
+        exhausted rankings are dropped.
+        """
+        disqualified = self.__class__()
+        for ranking, weight in self.items():
+            if loser in ranking:
+                ranking = tuple(x for x in ranking if x != loser)
+            if ranking:
+                disqualified[ranking] += weight
+        return disqualified
+
+    def requalify(self, leaders):
+        """
+        Returns a new histogram keeping only the given choices in
+        every ranking, for a recount of a run-off from scratch.
+        """
+        requalified = self.__class__()
+        for ranking, weight in self.items():
+            ranking = tuple(x for x in ranking if x in leaders)
+            if ranking:
+                requalified[ranking] += weight
+        return requalified
+
+
+class BallotPiles:
+    """
+    The ballots of a multi-round count, sorted into piles according to
+    the continuing choice each ballot currently counts for.
+    Eliminating a choice only touches the ballots on its pile, which
+    move on to their next continuing preference, so that a whole count
+    costs about one pass over every ranking rather than one pass over
+    every ballot per round.
+
+    With reverse=True, ballots are read from last preference to first.
+    """
+
+    def __init__(self, ballots, weights=None, reverse=False, deal=True):
+        """
+        ballots must support len() and indexing, e.g. a list of lists
+        of choices.  weights, if given, is a parallel sequence giving
+        the number of ballots each entry stands for.  With deal=False
+        the caller is expected to deal() every ballot itself.
+        """
+        self.ballots = ballots
+        self.weights = weights
+        self.reverse = reverse
+        self.position = array.array('l', [0]) * len(ballots)
+        self.piles = {}
+        self.first = {}
+        self.tallies = collections.Counter()
+        self.eliminated = set()
+        if deal:
+            for i in range(len(ballots)):
+                self.deal(i)
+
+    @classmethod
+    def from_responses(cls, responses, reverse=False, deal=True):
+        if isinstance(responses, rankmatrix.RankMatrix):
+            responses = RankingHistogram.from_matrix(responses)
+        if isinstance(responses, RankingHistogram):
+            return cls(list(responses.keys()), list(responses.values()), reverse, deal)
+        if not isinstance(responses, collections.abc.Sequence):
+            responses = list(responses)
+        return cls(responses, None, reverse, deal)
+
+    def deal(self, i):
+        """
+        Places ballot i on the pile of its first (or last) continuing
+        preference.
+        """
+        self.place(i, len(self.ballots[i]) - 1 if self.reverse else 0)
+
+    def place(self, i, p):
+        """
+        Places ballot i on the pile of the first continuing choice at
+        or after position p, in reading order.  Returns that choice, or
+        None if the ballot is exhausted.
+        """
+        ballot = self.ballots[i]
+        step = -1 if self.reverse else 1
+        while 0 <= p < len(ballot) and ballot[p] in self.eliminated:
+            p += step
+        if not 0 <= p < len(ballot):
+            return None
+        choice = ballot[p]
+        self.position[i] = p
+        try:
+            self.piles[choice].append(i)
+        except KeyError:
+            self.piles[choice] = [i]
+            self.first[choice] = i
+        else:
+            if i < self.first[choice]:
+                self.first[choice] = i
+        self.tallies[choice] += 1 if self.weights is None else self.weights[i]
+        return choice
+
+    def tally(self):
+        """
+        Returns the current tallies as a Counter, ordered as a fresh
+        count of the remaining ballots would order them, i.e. by the
+        earliest ballot counting for each choice.
+        """
+        tallies = self.tallies
+        order = sorted(tallies, key=self.first.__getitem__)
+        return collections.Counter({choice: tallies[choice] for choice in order})
+
+    def pile(self, choice):
+        """
+        Returns the indices of the ballots counting for a choice.
+        """
+        return self.piles.get(choice, [])
+
+    def move(self, choice, order=None, limit=None):
+        """
+        Removes a choice from the count and moves ballots on its pile
+        on to their next continuing preference.  Ballots are taken in
+        the order order(pile) gives them, by default the order of the
+        pile, and with a limit only that many of those that have a
+        continuing preference are moved.  The others stay with the
+        choice, though it no longer has a pile.  Returns the indices of
+        the ballots that were moved.
+        """
+        self.eliminated.add(choice)
+        self.tallies.pop(choice, None)
+        self.first.pop(choice, None)
+        step = -1 if self.reverse else 1
+        pile = self.piles.pop(choice, [])
+        moved = []
+        if limit == 0:
+            return moved
+        # place() inlined, as this is where a count spends its time
+        ballots, position, piles, first = self.ballots, self.position, self.piles, self.first
+        eliminated, tallies, weights = self.eliminated, self.tallies, self.weights
+        for i in (pile if order is None else order(pile)):
+            ballot = ballots[i]
+            p = position[i] + step
+            while 0 <= p < len(ballot) and ballot[p] in eliminated:
+                p += step
+            if not 0 <= p < len(ballot):
+                continue
+            choice = ballot[p]
+            position[i] = p
+            try:
+                piles[choice].append(i)
+            except KeyError:
+                piles[choice] = [i]
+                first[choice] = i
+            else:
+                if i < first[choice]:
+                    first[choice] = i
+            tallies[choice] += 1 if weights is None else weights[i]
+            moved.append(i)
+            if len(moved) == limit:
+                break
+        return moved
+
+    def eliminate(self, loser):
+        """
+        Removes a choice from the count and moves all the ballots on
+        its pile on to their next continuing preference.  Returns the
+        indices of the ballots that were on the pile, exhausted or not.
+        """
+        pile = self.pile(loser)
+        self.move(loser)
+        return pile
+
 
 class MultiRoundExhaustible(efcmabc.AbstractCountMethod):
     """
@@ -25,14 +246,77 @@ class MultiRoundExhaustible(efcmabc.AbstractCountMethod):
         self.residue = []
         self.results = None
 
+    def reset(self):
+        self.residue = []
+        self.results = None
+
     def disqualify(self, response, loser):
         """
         Returns a modified ballot, with an eliminated choice removed.
         """
         return [choice for choice in response if choice != loser]
 
+    def disqualify_all(self, responses, loser):
+        """
+        Returns the ballots for the next round, with an eliminated
+        choice removed from every one of them.
+        """
+        if isinstance(responses, RankingHistogram):
+            return responses.disqualify(loser)
+        return [self.disqualify(x, loser) for x in responses]
+
     def count(self, responses):
-        raise NotImplemented(self.__name__ + '.count')
+        """
+        Drives the count one round at a time until count_round()
+        reports that it is done.  Only the ballots of the round in
+        progress are kept alive; each round's ballots are released as
+        soon as the next round's have been built.
+        """
+        rd = 0
+        while responses is not None:
+            responses = self.count_round(rd, responses)
+            rd += 1
+
+    def count_round(self, rd, responses):
+        """
+        Counts round number rd (starting from 0), appending to the
+        residue.  Returns the ballots for the next round, or None if
+        the count is finished.
+        """
+        raise NotImplemented(self.__class__.__name__ + '.count_round')
+
+    def partial(self, responses):
+        """
+        Returns a summary of some of the ballots, to be combined with
+        the summaries of the rest by merge(): the histogram of their
+        distinct rankings.  Unlike first round tallies, these add up to
+        exactly the same count, round for round, as the ballots they
+        summarize, so precincts can report them instead of ballots.
+        The rows of a RankMatrix are collapsed by id and then decoded
+        with that matrix's own choices, so summaries of matrices that
+        interned the choices in different orders still add up.
+        """
+        if isinstance(responses, rankmatrix.RankMatrix):
+            return RankingHistogram.from_matrix(responses)
+        return RankingHistogram.from_responses(responses)
+
+    def merge(self, partials, choices=None):
+        """
+        Adds up summaries in the order given and counts the result.
+        choices decodes summaries keyed by tuples of ids, e.g. from
+        RankMatrix.count_rows(), which must all share that table;
+        RankingHistograms are already keyed by choice and are added as
+        they are.  Raises ValueError for a summary keyed by id without
+        a table to decode it.
+        """
+        histogram = RankingHistogram()
+        for partial in partials:
+            if not isinstance(partial, RankingHistogram):
+                if choices is None:
+                    raise ValueError('summary keyed by id, but no choices to decode it')
+                partial = {tuple(choices[x] for x in ids): n for ids, n in partial.items()}
+            histogram.update(partial)
+        self.count(histogram)
 
     def count_leaders(self, responses):
         """
@@ -40,13 +324,20 @@ class MultiRoundExhaustible(efcmabc.AbstractCountMethod):
         FirstPastThePost and returns a 2-tuple containing the results
         and the minimum number of votes required to win.  It is up to
         the real counting method to use this information appropriately.
+        Makes a single pass over the responses, which may be any
+        iterable, e.g. a stream.BallotStream.
         """
-        non_exhausted_votes = [x for x in responses if len(x)]
-        half = int(len(non_exhausted_votes) / 2)
-        first_choices = [[x[0]] for x in responses if len(x)]
+        if isinstance(responses, RankingHistogram):
+            counter = fptp.FirstPastThePost()
+            counter.update(responses.leaders())
+            return (counter, int(counter.residue / 2))
+        if isinstance(responses, rankmatrix.RankMatrix):
+            counter = fptp.FirstPastThePost()
+            counter.update(responses.tally(0))
+            return (counter, int(counter.residue / 2))
         counter = fptp.FirstPastThePost()
-        counter.count(first_choices)
-        return (counter, half)
+        counter.count([x[0]] for x in responses if len(x))
+        return (counter, int(counter.residue / 2))
 
     def are_we_there_yet(self):
         if self.results is None:
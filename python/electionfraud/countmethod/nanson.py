@@ -1,6 +1,11 @@
 # -*- python -*-
 
-class Nanson:
+import collections
+
+import electionfraud.countmethod.baldwin as baldwin
+import electionfraud.countmethod.borda as borda
+
+class Nanson(baldwin.BaldwinBase):
     """
     http://en.wikipedia.org/wiki/Nanson%27s_method
 
@@ -11,11 +16,29 @@ class Nanson:
     average in a field of N candidates, assuming random vote
     distribution?  Straight arithmetic mean of point totals after a
     count?  Something else?
+
+    This implementation takes the arithmetic mean of the traditional
+    Borda scores of the candidates still standing, and eliminates
+    every candidate at or below it.  If every candidate is at the
+    mean, they are tied and the count stops.  fieldsize defaults to
+    the number of candidates ranked on any ballot.
     """
 
-    def __init__(self):
+    def __init__(self, fieldsize=None):
         super().__init__()
+        self.fieldsize = fieldsize
+
+    def score_table(self, responses):
+        return borda.TraditionalScoreTable.from_responses(responses, self.fieldsize)
 
-    def count(self, responses):
-        raise NotImplemented()
-        
+    def count_round(self, rd, table):
+        this_round = collections.Counter(table.scores)
+        self.residue.append(this_round)
+        total = sum(this_round.values())
+        losers = [x for x, points in this_round.items() if points * len(this_round) <= total]
+        if len(this_round) < 2 or len(losers) == len(this_round):
+            self.results = this_round
+            return None
+        for loser in losers:
+            table.eliminate(loser)
+        return table
@@ -0,0 +1,71 @@
+# -*- python -*-
+
+import collections.abc
+import concurrent.futures
+import functools
+import itertools
+import os
+
+import electionfraud.rankmatrix as rankmatrix
+
+def count(method, responses, workers=None):
+    """
+    Counts responses with method, which must provide partial() and
+    merge() (e.g. FirstPastThePost or any BordaBase), across a pool of
+    worker processes.
+
+    The ballots are split into one contiguous shard per worker.  A
+    RankMatrix is sliced as it is; other responses are sliced as they
+    are, and each worker packs its own shard into a RankMatrix, so the
+    packing is shared out too.  The choices are listed up front in the
+    order they are first met, and every shard's matrix interns them in
+    that order, so that all the shards share the same ids.  Each
+    worker returns the partial tally of its shard keyed by id, and the
+    partial tallies are merged in shard order, so the results are
+    identical to those of a serial count no matter which worker
+    finishes first.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    if isinstance(responses, rankmatrix.RankMatrix):
+        shards = responses.shards(workers)
+        choices = responses.choices
+        job = method.partial
+    else:
+        if not isinstance(responses, collections.abc.Sequence):
+            responses = list(responses)
+        choices = list(dict.fromkeys(itertools.chain.from_iterable(responses)))
+        size = max(1, -(-len(responses) // workers))
+        shards = [responses[x:x + size] for x in range(0, len(responses), size)]
+        job = functools.partial(_partial, method, choices)
+    if workers == 1:
+        partials = [job(x) for x in shards]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            partials = list(pool.map(job, shards))
+    method.merge(partials, choices)
+
+def transfer(method, responses, leaders, workers=None):
+    """
+    Tallies the run-off transfers of a ContingentVote (see its
+    transfer()) across a pool of worker processes, one contiguous
+    shard of a RankMatrix each, numbered from the shard's first row,
+    and merges them in shard order.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    shards = responses.shards(workers)
+    starts = list(itertools.accumulate((x.rows for x in shards[:-1]), initial=0))
+    if workers == 1:
+        partials = [method.transfer(x, leaders, start) for x, start in zip(shards, starts)]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            partials = list(pool.map(method.transfer, shards, itertools.repeat(leaders), starts))
+    return method.merge_transfers(partials)
+
+def _partial(method, choices, responses):
+    """
+    Packs one shard of ballots into a RankMatrix with the ids of
+    choices, in a worker, and returns its partial tally.
+    """
+    return method.partial(rankmatrix.RankMatrix.from_responses(responses, choices=choices))
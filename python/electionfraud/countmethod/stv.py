@@ -1,8 +1,93 @@
 # -*- python -*-
 
 import abc
+import array
+import collections
+import collections.abc
+import fractions
+import functools
+import itertools
 
 import electionfraud.countmethod.abc as cmabc
+import electionfraud.countmethod.exception as cmx
+import electionfraud.countmethod.mrx as mrx
+import electionfraud.redist as redist
+
+class ExactArithmetic:
+    """
+    Ballot weights kept as fractions.Fraction, so that every transfer
+    is exact and a count can be audited to the last fraction of a
+    vote.
+
+    Meek keep values are the exception: left alone, their denominators
+    grow without bound from one iteration to the next, so they are
+    rounded up to a fixed number of decimal places, as Meek's rules
+    prescribe.  The tallies are exact given those keep values.
+    """
+
+    def __init__(self, places=9):
+        self.places = places
+        self.one = fractions.Fraction(1)
+        self.tolerance = fractions.Fraction(1, 10 ** 5)
+
+    def weight(self, ballots):
+        return fractions.Fraction(ballots)
+
+    def array(self, weights):
+        return list(weights)
+
+    def scale(self, x, num, den):
+        return fractions.Fraction(x) * num / den
+
+    def scale_up(self, x, num, den):
+        unit = 10 ** self.places
+        return fractions.Fraction(-(-x * num * unit // den), unit)
+
+    def apply(self, x, keep):
+        return x * keep
+
+    def quota(self, votes, seats):
+        return fractions.Fraction(votes) / (seats + 1)
+
+    def votes(self, x):
+        return fractions.Fraction(x)
+
+
+class FixedPointArithmetic:
+    """
+    Ballot weights kept as integer multiples of 10**-places of a vote,
+    in an array.array of 64-bit integers, with every division rounded
+    down, except for Meek keep values, which are rounded up.  Much
+    faster than ExactArithmetic, and what most published rule sets
+    specify.
+    """
+
+    def __init__(self, places=9):
+        self.places = places
+        self.one = 10 ** places
+        self.tolerance = max(1, self.one // 10 ** 5)
+
+    def weight(self, ballots):
+        return ballots * self.one
+
+    def array(self, weights):
+        return array.array('q', weights)
+
+    def scale(self, x, num, den):
+        return x * num // den
+
+    def scale_up(self, x, num, den):
+        return -(-x * num // den)
+
+    def apply(self, x, keep):
+        return x * keep // self.one
+
+    def quota(self, votes, seats):
+        return votes // (seats + 1) + 1
+
+    def votes(self, x):
+        return fractions.Fraction(x, self.one)
+
 
 class SingleTransferableVote(cmabc.AbstractCountMethod, metaclass=abc.ABCMeta):
     """
@@ -26,20 +111,368 @@ class SingleTransferableVote(cmabc.AbstractCountMethod, metaclass=abc.ABCMeta):
 
     There also exist several methods for choosing which votes to
     redistribute (Meek's, Warren's, Wright, Gregory).
+
+    Results are stored as a list of the elected choices, in the order
+    they were elected.  The residue is a list of the tallies of each
+    stage of the count, as collections.Counter of {choice: votes}.
     """
 
     def __init__(self, seats, redistributor):
         super().__init__()
         self.seats = seats
         self._redist = redistributor
+        self.results = None
+        self.residue = None
 
     @abc.abstractmethod
-    def quota(responses):
+    def quota(self, votes):
         """
         Given the number of valid unspoiled ballots, compute the quota
         for a choice to be considered elected by this method.
         """
         raise NotImplemented()
 
+    def droop(self, votes):
+        """
+        The Droop quota, in whole votes.
+        """
+        return votes // (self.seats + 1) + 1
+
     def count(self, responses):
-        raise NotImplemented()
+        """
+        Counts whole ballots.  An elected candidate's surplus is
+        transferred by moving that many of their ballots, in the order
+        the redistributor chooses them, on to their next continuing
+        preference; a chosen ballot with no continuing preference stays
+        put, and the next one is chosen instead.  An eliminated
+        candidate's ballots all move on.  Each transfer only looks at
+        the pile of the candidate elected or eliminated.
+        """
+        if not isinstance(responses, collections.abc.Sequence):
+            responses = list(responses)
+        piles = mrx.BallotPiles(responses)
+        hopeful = list(dict.fromkeys(itertools.chain.from_iterable(responses)))
+        quota = self.quota(len(responses))
+        self.results = None
+        self.residue = []
+        self.elected = []
+        kept = collections.Counter()
+        while True:
+            votes = collections.Counter({x: piles.tallies.get(x, 0) for x in hopeful})
+            self.residue.append(self.stage(kept, votes))
+            if self.finish(hopeful, votes):
+                return
+            winner, most = votes.most_common(1)[0]
+            if most >= quota:
+                self.elected.append(winner)
+                hopeful.remove(winner)
+                kept[winner] = most - self.transfer(piles, winner, most - quota)
+            else:
+                loser, _ = votes.most_common()[-1]
+                hopeful.remove(loser)
+                piles.eliminate(loser)
+
+    def transfer(self, piles, winner, surplus):
+        """
+        Moves surplus ballots chosen by the redistributor off an
+        elected candidate's pile.  Returns the number moved, which is
+        less than the surplus if too few ballots have a continuing
+        preference.
+        """
+        return len(piles.move(winner, self._redist, surplus))
+
+    def stage(self, kept, votes):
+        """
+        Returns the tally of a stage: the votes kept by the elected
+        candidates, then those of the candidates still hopeful.
+        """
+        stage = collections.Counter(kept)
+        stage.update(votes)
+        return stage
+
+    def finish(self, hopeful, votes):
+        """
+        Fills the seats left with the remaining candidates, most votes
+        first, if there are no more of them than seats.  Returns True
+        if the count is over.
+        """
+        if len(self.elected) < self.seats and len(self.elected) + len(hopeful) > self.seats:
+            return False
+        ranked = sorted(hopeful, key=lambda x: -votes[x])
+        self.elected.extend(ranked[0:self.seats - len(self.elected)])
+        self.results = self.elected
+        return True
+
+    def are_we_there_yet(self):
+        if self.results is None:
+            raise cmx.IncompleteCount()
+
+    def interpret_result(self):
+        self.are_we_there_yet()
+        interpretation = ''
+        for choice in self.results:
+            interpretation += '%s elected\n' % (choice)
+        return interpretation
+
+    def interpret_residue(self):
+        self.are_we_there_yet()
+        interpretation = ''
+        ctr = 1
+        for stage in self.residue:
+            interpretation += 'Stage %d:\n' % (ctr)
+            for choice, votes in stage.items():
+                interpretation += '%s has %s votes\n' % (choice, votes)
+            ctr += 1
+        return interpretation
+
+    def leader(self):
+        self.are_we_there_yet()
+        return self.results[0]
+
+    def trailer(self):
+        self.are_we_there_yet()
+        last, _ = self.residue[-1].most_common()[-1]
+        return last
+
+
+class WholeBallotSTV(SingleTransferableVote):
+    """
+    http://en.wikipedia.org/wiki/Counting_Single_Transferable_Votes
+
+    Transfers whole ballots, chosen by a redistributor, with the Droop
+    quota, as in Cambridge, Massachusetts.  The redistributor is called
+    with a pile of ballots and must iterate over them in the order they
+    are to be chosen.  By default it is redist.Cincinnati, wrapping
+    round piles whose size is a multiple of 11; redist.HareRandom
+    chooses at random.
+    """
+
+    def __init__(self, seats, redistributor=None):
+        if redistributor is None:
+            redistributor = functools.partial(redist.Cincinnati, wrap=True)
+        super().__init__(seats, redistributor)
+
+    def quota(self, votes):
+        return self.droop(votes)
+
+
+class FractionalTransfer(SingleTransferableVote):
+    """
+    STV methods that transfer every ballot at a fraction of its value,
+    rather than choosing whole ballots to transfer.  Identical rankings
+    are collapsed before counting, and their weights are kept in one
+    array, in the representation of the arithmetic given: an
+    ExactArithmetic or a FixedPointArithmetic (the default).
+    """
+
+    def __init__(self, seats, redistributor, arithmetic=None):
+        super().__init__(seats, redistributor)
+        self.arithmetic = FixedPointArithmetic() if arithmetic is None else arithmetic
+
+    def prepare(self, responses):
+        """
+        Collapses the ballots and returns a 2-tuple of a BallotPiles
+        over the distinct rankings and the list of candidates, in the
+        order they first appear.
+        """
+        if not isinstance(responses, mrx.RankingHistogram):
+            responses = mrx.RankingHistogram.from_responses(responses)
+        ballots = list(responses.keys())
+        weights = self.arithmetic.array(self.arithmetic.weight(x) for x in responses.values())
+        candidates = list(dict.fromkeys(itertools.chain.from_iterable(ballots)))
+        self.total = sum(responses.values())
+        self.results = None
+        self.residue = []
+        self.elected = []
+        return (mrx.BallotPiles(ballots, weights), candidates)
+
+    def record(self, votes):
+        """
+        Appends a stage to the residue, converted to votes.
+        """
+        arithmetic = self.arithmetic
+        self.residue.append(collections.Counter({x: arithmetic.votes(v) for x, v in votes.items()}))
+
+
+class GregorySTV(FractionalTransfer):
+    """
+    http://en.wikipedia.org/wiki/Counting_Single_Transferable_Votes
+
+    The weighted inclusive Gregory method.  The largest surplus is
+    transferred first: every ballot counting for the elected candidate
+    moves on to its next continuing preference, at its current weight
+    multiplied by surplus / votes.  Eliminated candidates' ballots move
+    on at their current weight.  The quota is the Droop quota.
+
+    Only the ballots on the pile of the candidate elected or eliminated
+    are looked at in each stage.
+    """
+
+    def __init__(self, seats, arithmetic=None):
+        super().__init__(seats, redist.Gregory, arithmetic)
+
+    def quota(self, votes):
+        return self.arithmetic.weight(self.droop(votes))
+
+    def count(self, responses):
+        piles, hopeful = self.prepare(responses)
+        quota = self.quota(self.total)
+        zero = self.arithmetic.weight(0)
+        kept = collections.Counter()
+        while True:
+            votes = collections.Counter({x: piles.tallies.get(x, zero) for x in hopeful})
+            self.record(self.stage(kept, votes))
+            if self.finish(hopeful, votes):
+                return
+            winner, most = votes.most_common(1)[0]
+            if most >= quota:
+                self.elected.append(winner)
+                hopeful.remove(winner)
+                kept[winner] = quota
+                weights = piles.weights
+                for i in piles.pile(winner):
+                    weights[i] = self.arithmetic.scale(weights[i], most - quota, most)
+                piles.eliminate(winner)
+            else:
+                loser, _ = votes.most_common()[-1]
+                hopeful.remove(loser)
+                piles.eliminate(loser)
+
+
+class MeekSTV(FractionalTransfer):
+    """
+    http://en.wikipedia.org/wiki/Counting_Single_Transferable_Votes#Meek
+
+    Every elected candidate has a keep value, the fraction of each
+    vote reaching them that they keep; the rest passes on to the next
+    preference.  Keep values are adjusted, iteratively, until every
+    elected candidate's votes are within tolerance of the quota, which
+    is itself recomputed from the votes not exhausted.  Eliminated
+    candidates keep nothing, as if they had never been ranked.
+
+    How a ballot is shared out depends only on the elected candidates
+    ranked ahead of its first hopeful candidate.  Ballots are kept in
+    groups by those, and each iteration visits the groups rather than
+    the ballots; a ballot only moves between groups when its hopeful
+    candidate is elected or eliminated.  With FixedPointArithmetic,
+    votes are therefore rounded down once per group rather than once
+    per ballot.
+    """
+
+    def __init__(self, seats, arithmetic=None):
+        super().__init__(seats, redist.Meek, arithmetic)
+
+    def quota(self, votes):
+        return self.arithmetic.quota(votes, self.seats)
+
+    def count(self, responses):
+        piles, hopeful = self.prepare(responses)
+        arithmetic = self.arithmetic
+        self.keep = {}
+        # each ballot's path: the elected candidates it passes through
+        self.paths = [()]
+        self._path_ids = {(): 0}
+        self.ballot_paths = array.array('l', [0]) * len(piles.ballots)
+        self.groups = collections.Counter({(0, x): n for x, n in piles.tallies.items()})
+        exhausted = arithmetic.weight(self.total) - sum(piles.tallies.values())
+        if exhausted:
+            self.groups[0, None] = exhausted
+        while True:
+            votes = self.converge(hopeful)
+            self.record(votes)
+            if self.finish(hopeful, votes):
+                return
+            winners = [x for x in sorted(hopeful, key=lambda x: -votes[x]) if votes[x] >= self.current_quota]
+            if winners:
+                for winner in winners[0:self.seats - len(self.elected)]:
+                    self.elected.append(winner)
+                    hopeful.remove(winner)
+                    self.keep[winner] = arithmetic.one
+                    self.regroup(piles, winner)
+            else:
+                lowest = collections.Counter({x: votes[x] for x in hopeful})
+                loser, _ = lowest.most_common()[-1]
+                hopeful.remove(loser)
+                self.regroup(piles, loser)
+            if len(self.elected) == self.seats:
+                self.results = self.elected
+                return
+
+    def regroup(self, piles, choice):
+        """
+        Moves the ballots whose first hopeful candidate was choice,
+        just elected or eliminated, on to the next, extending their
+        paths by the elected candidates they pass on the way.
+        """
+        paths, ids, groups = self.paths, self._path_ids, self.groups
+        ballots, position, eliminated = piles.ballots, piles.position, piles.eliminated
+        weights, ballot_paths = piles.weights, self.ballot_paths
+        keep = self.keep
+        before = {i: position[i] for i in piles.pile(choice)}
+        # every ballot counting for choice moves on, emptying its groups
+        for key in [x for x in groups if x[1] == choice]:
+            del groups[key]
+        elected = choice in keep
+        for i in piles.eliminate(choice):
+            old = ballot_paths[i]
+            ballot = ballots[i]
+            now = ballot[position[i]]
+            if now in eliminated:
+                now = None
+            # the piles skip elected candidates as well as eliminated
+            # ones, but a ballot's path takes in every elected candidate
+            # it passes
+            start = before[i]
+            end = len(ballot) if now is None else position[i]
+            if elected or end - start > 1:
+                path = tuple(x for x in ballot[start:end] if x in keep)
+                if path:
+                    path = paths[old] + path
+                    if path not in ids:
+                        ids[path] = len(paths)
+                        paths.append(path)
+                    ballot_paths[i] = old = ids[path]
+            groups[old, now] += weights[i]
+
+    def distribute(self, hopeful):
+        """
+        Returns a 2-tuple of the votes of every candidate given the
+        current keep values, and the votes exhausted.
+        """
+        arithmetic = self.arithmetic
+        keep, paths = self.keep, self.paths
+        votes = collections.Counter({x: arithmetic.weight(0) for x in self.elected + hopeful})
+        excess = arithmetic.weight(0)
+        for (path, choice), weight in self.groups.items():
+            for elected in paths[path]:
+                kept = arithmetic.apply(weight, keep[elected])
+                votes[elected] += kept
+                weight -= kept
+            if choice is None:
+                excess += weight
+            else:
+                votes[choice] += weight
+        return (votes, excess)
+
+    def converge(self, hopeful):
+        """
+        Adjusts the keep values until the surplus is within tolerance
+        or a hopeful candidate reaches the quota, and returns the
+        votes.
+        """
+        arithmetic = self.arithmetic
+        total = arithmetic.weight(self.total)
+        while True:
+            votes, excess = self.distribute(hopeful)
+            self.current_quota = quota = self.quota(total - excess)
+            surplus = sum(votes[x] - quota for x in self.elected if votes[x] > quota)
+            if surplus <= arithmetic.tolerance or any(votes[x] >= quota for x in hopeful):
+                return votes
+            changed = False
+            for elected in self.elected:
+                keep = arithmetic.scale_up(self.keep[elected], quota, votes[elected])
+                if keep < self.keep[elected]:
+                    self.keep[elected] = keep
+                    changed = True
+            if not changed:
+                return votes
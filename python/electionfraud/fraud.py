@@ -1,7 +1,5 @@
 # -*- python -*-
 
-import uuid
-
 class ElectionException(Exception):
     """
     Our own basic exception.  We expect it to be subclassed.
@@ -11,14 +9,42 @@ class ElectionException(Exception):
 class Choice:
     """
     Mostly a wrapper around strings to make them not act like sequence types.
+
+    Choices are interned: Choice(x) returns the one Choice of that
+    name, made the first time it is asked for, so choices with equal
+    names are the same object and compare and hash by identity, in C,
+    which is what every Counter and dict in the count methods does
+    with them.  Each also has a small dense id, its place in order of
+    creation, for indexing arrays; ids are only good for the life of
+    the process, and pickled Choices carry their names instead.
     """
 
-    namespace = 'urn:nog:dev:electionfraud:choice'
+    __slots__ = ('_x', 'id')
+
+    _registry = {}
+    _by_id = []
+
+    def __new__(cls, x):
+        try:
+            return cls._registry[x]
+        except KeyError:
+            self = super().__new__(cls)
+            self._x = x
+            self.id = len(cls._by_id)
+            cls._registry[x] = self
+            cls._by_id.append(self)
+            return self
+
+    @classmethod
+    def from_id(cls, id):
+        """
+        Returns the Choice with the given id.
+        """
+        return cls._by_id[id]
+
+    def __reduce__(self):
+        return (Choice, (self._x,))
 
-    def __init__(self, x):
-        self._x = x
-        self._u = uuid.uuid5(uuid.NAMESPACE_URL, Choice.namespace)
-        
     def __str__(self):
         return str(self._x)
 
@@ -0,0 +1,150 @@
+# -*- python -*-
+
+"""
+Reading ballots out of cast vote record (CVR) exports, one row (CSV)
+or one line (JSON lines) per ballot, listing the choices in order of
+preference.
+
+Files are read a batch of ballots at a time, and every candidate name
+is interned into a Choice the first time it is seen, through a
+ChoiceTable, so that the same name is always the same Choice.  A batch
+is a list of ballots, as the count methods take; matrices() packs the
+batches into RankMatrix instances sharing one set of ids, ready for
+the count methods' partial() and merge().
+"""
+
+import csv
+import itertools
+import json
+import operator
+
+import electionfraud.rankmatrix as rankmatrix
+import electionfraud.stream as stream
+from electionfraud.fraud import Choice
+
+class ChoiceTable(dict):
+    """
+    A mapping of {name: Choice}, making each Choice the first time its
+    name is looked up.
+
+    CVR exports repeat the same few rankings over and over, so the
+    table also remembers the ballot made of each distinct ranking of
+    names, up to limit of them for each set of names skipped, and
+    makes each ballot only once.
+    """
+
+    def __init__(self, *args, limit=1 << 20, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limit = limit
+        self.rankings = {}
+
+    def __missing__(self, name):
+        choice = self[name] = Choice(name)
+        return choice
+
+    def ballots(self, rankings, skip=('',)):
+        """
+        Returns a list of ballots, one per ranking, a tuple of names.
+        Names in skip are left out.
+        """
+        skip = frozenset(skip)
+        try:
+            cache = self.rankings[skip]
+        except KeyError:
+            cache = self.rankings[skip] = {}
+        ballots = list(map(cache.get, rankings))
+        if None in ballots:
+            for k, ballot in enumerate(ballots):
+                if ballot is None:
+                    ranking = rankings[k]
+                    ballot = cache.get(ranking)
+                    if ballot is None:
+                        if len(cache) >= self.limit:
+                            cache.clear()
+                        ballot = cache[ranking] = tuple([self[x] for x in ranking if x not in skip])
+                    ballots[k] = ballot
+        return list(map(list, ballots))
+
+
+def csv_batches(path, table=None, header=False, columns=None, skip=('',), size=1 << 12, **fmtparams):
+    """
+    Yields lists of up to size ballots from a CSV file.  Each row is a
+    ballot; columns, a slice, picks out the cells holding the ranked
+    choices (by default, all of them).  Cells in skip, e.g. blanks or
+    'undervote', are left out.  With header=True the first row is
+    skipped.  fmtparams are passed on to csv.reader.
+    """
+    table = ChoiceTable() if table is None else table
+    skip = frozenset(skip)
+    with open(path, newline='') as f:
+        reader = csv.reader(f, **fmtparams)
+        if header:
+            next(reader, None)
+        while True:
+            with stream.paused_gc():
+                rows = list(itertools.islice(reader, size))
+                if not rows:
+                    return
+                if columns is not None:
+                    rows = map(operator.itemgetter(columns), rows)
+                batch = table.ballots(list(map(tuple, rows)), skip)
+            yield batch
+
+def jsonl_batches(path, table=None, key=None, skip=('',), size=1 << 12):
+    """
+    Yields lists of up to size ballots from a JSON lines file.  Each
+    line is a ballot: a list of candidate names or, if key is given,
+    an object with such a list under key.  Names in skip are left out.
+    """
+    table = ChoiceTable() if table is None else table
+    skip = frozenset(skip)
+    with open(path) as f:
+        while True:
+            with stream.paused_gc():
+                lines = list(itertools.islice(f, size))
+                if not lines:
+                    return
+                # one call to the decoder per batch, rather than per line
+                rankings = json.loads('[' + ','.join([x for x in lines if not x.isspace()]) + ']')
+                if key is not None:
+                    rankings = map(operator.itemgetter(key), rankings)
+                batch = table.ballots(list(map(tuple, rankings)), skip)
+            yield batch
+
+def matrices(batches, width, choices=()):
+    """
+    Yields each batch of ballots as a RankMatrix of the given width.
+    All of the matrices share one list of choices and one set of ids,
+    e.g. for parallel.count() or partial() and merge() with
+    choices=matrix.choices.
+    """
+    shared = rankmatrix.RankMatrix(width, choices)
+    for batch in batches:
+        matrix = rankmatrix.RankMatrix(width)
+        matrix.choices = shared.choices
+        matrix.ids = shared.ids
+        matrix.extend(batch)
+        yield matrix
+
+def ballots(batches):
+    """
+    Yields the ballots of every batch, one at a time.
+    """
+    return itertools.chain.from_iterable(batches)
+
+def csv_ballots(path, table=None, **options):
+    """
+    Returns a BallotStream over the ballots of a CSV file, e.g. for a
+    multi-round count.  options are as for csv_batches().  Every pass
+    interns names into the same table.
+    """
+    table = ChoiceTable() if table is None else table
+    return stream.BallotStream(lambda: ballots(csv_batches(path, table, **options)))
+
+def jsonl_ballots(path, table=None, **options):
+    """
+    Returns a BallotStream over the ballots of a JSON lines file.
+    options are as for jsonl_batches().
+    """
+    table = ChoiceTable() if table is None else table
+    return stream.BallotStream(lambda: ballots(jsonl_batches(path, table, **options)))
@@ -0,0 +1,269 @@
+# -*- python -*-
+
+import array
+import collections
+import sys
+
+class RankMatrix:
+    """
+    A compact store for ranked ballots.  Each distinct choice is
+    interned to a small integer id, and the rankings are kept as the
+    rows of a padded array of ids, alongside an array of row lengths
+    and an array of weights (the number of ballots each row stands
+    for).  A few bytes per ranked choice, rather than a list object
+    per ballot.
+
+    Iterating over a RankMatrix yields each ranking as a list of
+    choices, once per ballot, so it can stand in for the list of
+    ballots it was built from.  Count methods that know about
+    RankMatrix tally the arrays directly instead.
+    """
+
+    PAD = -1
+
+    # with no more choices than this, it is quicker to count how often
+    # each id turns up in a column than to build a Counter of it
+    FEW = 24
+
+    def __init__(self, width, choices=()):
+        """
+        width is the greatest number of choices any one ballot may
+        rank.  choices, if given, are interned up front in order, so
+        that several matrices can share the same ids.
+        """
+        self.width = width
+        self.choices = []
+        self.ids = {}
+        self.ranks = array.array('h')
+        self.lengths = array.array('h')
+        self.weights = array.array('q')
+        self.weighted = False
+        for choice in choices:
+            self.intern(choice)
+
+    @classmethod
+    def from_responses(cls, responses, width=None, choices=()):
+        """
+        Builds a matrix out of a list of ranked ballots.  If width is
+        not given, responses must be iterable more than once.
+        """
+        if width is None:
+            width = max((len(x) for x in responses), default=0)
+        matrix = cls(width, choices)
+        matrix.extend(responses)
+        return matrix
+
+    def intern(self, choice):
+        """
+        Returns the id of a choice, assigning the next free one if the
+        choice has not been seen before.
+        """
+        try:
+            return self.ids[choice]
+        except KeyError:
+            self.ids[choice] = len(self.choices)
+            self.choices.append(choice)
+            return self.ids[choice]
+
+    def append(self, response, weight=1):
+        """
+        Adds a ranking which stands for weight identical ballots.
+        """
+        if len(response) > self.width:
+            raise ValueError('ranking longer than %d choices' % (self.width))
+        intern = self.intern
+        self.ranks.extend([intern(x) for x in response])
+        self.ranks.extend([self.PAD] * (self.width - len(response)))
+        self.lengths.append(len(response))
+        self.weights.append(weight)
+        if weight != 1:
+            self.weighted = True
+
+    def extend(self, responses):
+        for response in responses:
+            self.append(response)
+
+    def slice(self, start, stop):
+        """
+        Returns rows start up to stop as a new matrix, sharing this
+        one's choices and ids.
+        """
+        part = self.__class__(self.width)
+        part.choices = self.choices
+        part.ids = self.ids
+        part.ranks = self.ranks[start * self.width:stop * self.width]
+        part.lengths = self.lengths[start:stop]
+        part.weights = self.weights[start:stop]
+        part.weighted = self.weighted
+        return part
+
+    def __getstate__(self):
+        """
+        Pickles arrays that are memoryviews, e.g. into a mapped ballot
+        file, as plain arrays, so that shards of them can be sent to
+        worker processes.
+        """
+        state = self.__dict__.copy()
+        for name in ('ranks', 'lengths', 'weights'):
+            if isinstance(state[name], memoryview):
+                state[name] = array.array(state[name].format, state[name].tobytes())
+        return state
+
+    def view(self, indices):
+        """
+        Returns a RowView of the given rows, in the order given.
+        """
+        return RowView(self, indices)
+
+    def shards(self, n):
+        """
+        Splits the rows into no more than n contiguous slices of about
+        the same size, in order.
+        """
+        size = max(1, -(-self.rows // n))
+        return [self.slice(x, x + size) for x in range(0, self.rows, size)]
+
+    @property
+    def rows(self):
+        return len(self.lengths)
+
+    def __len__(self):
+        """
+        The number of ballots, which is not the number of rows if any
+        row has a weight other than 1.
+        """
+        if self.weighted:
+            return sum(self.weights)
+        return self.rows
+
+    def __iter__(self):
+        for i in range(self.rows):
+            ranking = self.decode(self.row(i))
+            for _ in range(self.weights[i]):
+                yield list(ranking)
+
+    def row(self, i):
+        """
+        Returns the ids ranked on row i, without padding.
+        """
+        offset = i * self.width
+        return self.ranks[offset:offset + self.lengths[i]]
+
+    def column(self, rank):
+        """
+        Returns the ids at a given rank (starting from 0) of every row,
+        PAD where a row ranks fewer choices.
+        """
+        return self.ranks[rank::self.width]
+
+    def decode(self, ids):
+        choices = self.choices
+        return [choices[x] for x in ids]
+
+    def count_ids(self, rank=None):
+        """
+        Returns a Counter of {id: ballots} for the choices at a given
+        rank, or at every rank if rank is None.  Ids appear in the
+        order they are first met reading row by row.
+        """
+        if not self.weighted:
+            if len(self.choices) <= self.FEW:
+                return self._count_bytes(rank)
+            cells = self.ranks if rank is None else self.column(rank)
+            counts = collections.Counter(cells)
+            counts.pop(self.PAD, None)
+            return counts
+        counts = collections.Counter()
+        for i, weight in enumerate(self.weights):
+            if rank is None:
+                cells = self.row(i)
+            elif rank < self.lengths[i]:
+                cells = (self.ranks[i * self.width + rank],)
+            else:
+                continue
+            for x in cells:
+                counts[x] += weight
+        return counts
+
+    def _count_bytes(self, rank=None):
+        """
+        count_ids() for an unweighted matrix of FEW choices or less,
+        whose ids all fit in the low byte of their cells, where PAD is
+        the only 0xff.  The low bytes of a column are copied out as a
+        bytes object, in which each id is counted, and found, in C.
+        """
+        size = self.ranks.itemsize
+        low = 0 if sys.byteorder == 'little' else size - 1
+        cells = memoryview(self.ranks).cast('B')
+        if rank is None:
+            column = cells[low::size].tobytes()
+        else:
+            column = cells[rank * size + low::self.width * size].tobytes()
+        counts = {}
+        for x in range(len(self.choices)):
+            n = column.count(x)
+            if n:
+                counts[x] = n
+        return collections.Counter({x: counts[x] for x in sorted(counts, key=column.find)})
+
+    def count_rows(self):
+        """
+        Returns a Counter of {tuple of ids: ballots}, collapsing
+        identical rankings, in the order they are first met.
+        """
+        if not self.weighted:
+            return collections.Counter(tuple(self.row(i)) for i in range(self.rows))
+        counts = collections.Counter()
+        for i, weight in enumerate(self.weights):
+            counts[tuple(self.row(i))] += weight
+        return counts
+
+    def tally(self, rank=None):
+        """
+        As count_ids(), but keyed by choice rather than by id.
+        """
+        choices = self.choices
+        return collections.Counter({choices[x]: n for x, n in self.count_ids(rank).items()})
+
+
+class RowView:
+    """
+    Some rows of a RankMatrix, in some order, e.g. the ballots chosen
+    by a redistributor, without copying them.  Row i of the view is
+    row indices[i] of the matrix, and row() is a memoryview straight
+    into the matrix's array of ids.  Like the matrix, the view can
+    stand in for a list of ballots.
+
+    While a view exists the matrix cannot grow, as the array it would
+    have to resize is exported to the view.
+    """
+
+    def __init__(self, matrix, indices):
+        self.matrix = matrix
+        self.indices = indices
+        self._ranks = memoryview(matrix.ranks)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def row(self, i):
+        """
+        Returns the ids ranked on row i of the view, without padding.
+        """
+        matrix = self.matrix
+        r = self.indices[i]
+        offset = r * matrix.width
+        return self._ranks[offset:offset + matrix.lengths[r]]
+
+    def __getitem__(self, i):
+        return self.matrix.decode(self.row(i))
+
+    def __iter__(self):
+        for i in range(len(self.indices)):
+            yield self[i]
+
+    def release(self):
+        """
+        Releases the matrix's array, so that it may grow again.
+        """
+        self._ranks.release()
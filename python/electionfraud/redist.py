@@ -1,11 +1,13 @@
 # -*- python -*-
 
+import array
 import collections.abc
-import fractions
 import logging
-import random
+import math
 
-logging.basicConfig(level=logging.DEBUG)
+import electionfraud.rng as efrng
+
+logger = logging.getLogger(__name__)
 
 class Redistributor(collections.abc.Iterable):
     """
@@ -26,6 +28,25 @@ class Redistributor(collections.abc.Iterable):
     def __iter__(self):
         return NotImplemented()
 
+    def indices(self):
+        """
+        Returns the indices into responses of every ballot, in the order
+        they are chosen, as an array.
+        """
+        return NotImplemented()
+
+    def view(self, matrix):
+        """
+        Returns a rankmatrix.RowView of the chosen ballots, in the order
+        they are chosen, without copying them.  responses is either the
+        matrix itself or a sequence of its row numbers, e.g. a pile;
+        either way the matrix should hold one ballot per row.
+        """
+        indices = self.indices()
+        if self.responses is not matrix:
+            indices = array.array('l', map(self.responses.__getitem__, indices))
+        return matrix.view(indices)
+
 class Identity(Redistributor):
     """
     Chooses all votes in their original order.  Not really much of a
@@ -34,51 +55,87 @@ class Identity(Redistributor):
     def __next__(self):
         return iter(self.responses)
 
+    def indices(self):
+        return array.array('l', range(len(self.responses)))
+
     __iter__ = __next__
     __call__ = __next__
 
+def debug_trace(k, index):
+    """
+    A trace for NthSubset that logs every choice at DEBUG level.
+    """
+    logger.debug('choice %d: ballot %d', k, index)
+
 class NthSubset(Redistributor):
     """
     Chooses every Nth ballot.  Raises ValueError if N and
     len(responses) are not relatively prime, because potentially every
     ballot could be counted.
+
+    With wrap=True any N is accepted: whenever counting every Nth
+    ballot comes back round to a ballot already chosen, it carries on
+    from the ballot after it, so that every ballot is still chosen
+    exactly once.  Piles of ballots to transfer come in every size, so
+    an STV count needs this.
+
+    trace, if given, is called with (k, index) as the kth ballot chosen
+    is taken from responses[index], e.g. debug_trace.  Without it,
+    choosing a ballot costs little more than the index arithmetic.
     """
-    def __init__(self, responses, n):
+    def __init__(self, responses, n, wrap=False, trace=None):
         if n == 1:
             raise ValueError('trivial redistribution not supported')
-        if fractions.gcd(len(responses), n) != 1:
+        if not wrap and math.gcd(len(responses), n) != 1:
             raise ValueError('n and len(responses) must be relatively prime')
         self._nth = n
         self._current = None
-        self._remaining = len(responses)
-        self.logger = logging.getLogger(__name__)
+        self.trace = trace
         super().__init__(responses)
 
-    def __next__(self):
+    def indices(self):
         """
+        The positions chosen run up through responses in steps of N
+        until they pass the end and wrap round, so the whole order is
+        built from one range() per pass, rather than one ballot at a
+        time.
         """
-        self.logger.debug('initial next()')
-        self._current = -1
-        try:
-            while True:
-                try:
-                    self.logger.debug('previous remaining: %d', self._remaining)
-                    self.logger.debug('previous current: %d', self._current)
-                    if self._remaining:
-                        self._current = (self._current + self._nth) % len(self.responses)
-                        self._remaining -= 1
-                        self.logger.debug('new current: %d', self._current)
-                        self.logger.debug('new remaining: %d', self._remaining)
-                        yield self.responses[self._current]
-                    else:
-                        raise StopIteration()
-                finally:
-                    pass
-        finally:
-            pass
-        self.logger.debug('fell off the end')
-        return None
-                
+        n = self._nth
+        size = len(self.responses)
+        order = array.array('l')
+        if not size:
+            return order
+        cycles = math.gcd(size, n)
+        for c in range(cycles):
+            x = (n - 1 + c) % size
+            remaining = size // cycles
+            while remaining:
+                run = range(x, size, n)[0:remaining]
+                order.extend(run)
+                remaining -= len(run)
+                x = (run[-1] + n) % size
+        return order
+
+    def __next__(self):
+        responses = self.responses
+        if self.trace is None:
+            yield from map(responses.__getitem__, self.indices())
+            return
+        n = self._nth
+        size = len(responses)
+        cycle = size // math.gcd(size, n) if size else 0
+        trace = self.trace
+        current = -1
+        for k in range(size):
+            if k and k % cycle == 0:
+                # back where this cycle started, so move one along
+                current += 1
+            current = (current + n) % size
+            if trace is not None:
+                trace(k, current)
+            yield responses[current]
+        self._current = current
+
     __call__ = __next__
     __iter__ = __next__
 
@@ -87,40 +144,52 @@ class Cincinnati(NthSubset):
     A specialization of NthSubset, with N = 11.  Supposedly used in
     the city of Cambridge, Massachusetts.
     """
-    def __init__(self, responses):
-        super().__init__(responses, 11)
+    def __init__(self, responses, wrap=False, trace=None):
+        super().__init__(responses, 11, wrap, trace)
     
 
 class HareRandom(Redistributor):
     """
-    Choose ballots randomly, without repetition.
+    Choose ballots randomly, without repetition.  seed may be anything
+    rng.generator() accepts: pass the same seed, or generators from
+    the same rng.spawn(), to reproduce a redistribution exactly.
+
+    The whole order is drawn at once by order(), the first time it is
+    needed, and iterating again repeats it.  responses with a length,
+    e.g. a pile or a RankMatrix for view(), are drawn from as they
+    are; anything else is read into a list first.
     """
-    def __init__(self, responses):
-        self.responses = responses.copy()
+    def __init__(self, responses, seed=None):
+        if not isinstance(responses, collections.abc.Sized):
+            responses = list(responses)
+        self.responses = responses
+        self.rng = efrng.generator(seed)
+        self._order = None
+
+    def order(self):
+        """
+        Returns the indices of the ballots, in the order they are
+        chosen, as an array.
+        """
+        if self._order is None:
+            self._order = efrng.permutation(len(self.responses), self.rng)
+        return self._order
+
+    indices = order
 
     def __next__(self):
-        try:
-            while True:
-                try:
-                    if len(self.responses):
-                        n = random.randint(0, len(self.responses) - 1)
-                        item = self.responses.pop(n)
-                        yield item
-                    else:
-                        raise StopIteration()
-                finally:
-                    pass
-        finally:
-            pass
-        return None
+        return map(self.responses.__getitem__, self.order())
 
     __call__ = __next__
     __iter__ = __next__
 
         
 
-class Gregory(Redistributor):
+class Gregory(Identity):
     """
+    Gregory's method transfers every ballot, at a fraction of its
+    value, so every ballot is chosen, in its original order.  See
+    countmethod.stv.GregorySTV for the count itself.
     """
     pass
 
@@ -129,8 +198,11 @@ class Wright(Redistributor):
     """
     pass
 
-class Meek(Redistributor):
+class Meek(Identity):
     """
+    Meek's method shares every ballot out between the elected
+    candidates it ranks, so every ballot is chosen, in its original
+    order.  See countmethod.stv.MeekSTV for the count itself.
     """
     pass
 
@@ -1,8 +1,11 @@
 # -*- python -*-
 
 import abc
+import array
 
+import electionfraud.rankmatrix as rankmatrix
 import electionfraud.responseformat.exception as rfx
+import electionfraud.stream as stream
 
 class Abstract(metaclass=abc.ABCMeta):
     """
@@ -48,3 +51,96 @@ class Abstract(metaclass=abc.ABCMeta):
         """
         if len(responses) > len(set(responses)):
             raise rfx.DuplicateChoice()
+
+    def validate_batch(self, responses, field=None):
+        """
+        Validates a batch of responses at once, either a list of them
+        or a RankMatrix of them.  Returns an array with one reason code
+        per response, in order: 0 if the response is proper, otherwise
+        the code of the ResponseException that validate() raises for
+        it (see exception.reason()), so that the nonzero entries mark
+        the spoiled responses.
+
+        Each distinct response is validated only once, and its code
+        shared with every identical response in the batch; identical
+        down to the types of the values in it (see exact()), as a
+        rating of 1.0 is not a rating of 1.  A response that is not
+        even of the right shape, e.g. a pair that is not a 2-tuple,
+        gets the code of ResponseException.
+
+        This is not a vectorized check: every distinct response still
+        goes through validate(), and the saving is only in not
+        validating the same response twice.
+        """
+        if isinstance(responses, rankmatrix.RankMatrix):
+            return self.validate_matrix(responses, field)
+        codes = {}
+        batch = array.array('b')
+        with stream.paused_gc():
+            for response in responses:
+                try:
+                    key = exact(response)
+                    code = codes.get(key)
+                except TypeError:
+                    key = code = None
+                if code is None:
+                    code = self.reason(response, field)
+                    if key is not None:
+                        codes[key] = code
+                batch.append(code)
+        return batch
+
+    def validate_matrix(self, matrix, field=None):
+        """
+        As validate_batch(), for the rows of a RankMatrix, with one
+        code per row, each validated as a list of choices made into a
+        response by response().  Each row is looked up whole, as the
+        bytes of its padded ids, and each distinct ranking is decoded
+        and validated once.
+        """
+        size = matrix.width * matrix.ranks.itemsize
+        if not size:
+            return array.array('b', [self.reason(self.response([]), field)] * matrix.rows)
+        ranks = bytes(matrix.ranks)
+        with stream.paused_gc():
+            rows = [ranks[x:x + size] for x in range(0, len(ranks), size)]
+            codes = dict.fromkeys(rows)
+            for row in codes:
+                ids = [x for x in array.array('h', row) if x != matrix.PAD]
+                codes[row] = self.reason(self.response(matrix.decode(ids)), field)
+            return array.array('b', bytes(map(codes.__getitem__, rows)))
+
+    def response(self, choices):
+        """
+        Returns a list of choices (e.g. a row of a RankMatrix) as a
+        response of this format.
+        """
+        return choices
+
+    def reason(self, response, field=None):
+        """
+        Returns the reason code for a single response; 0 if it is
+        proper.
+        """
+        try:
+            self.validate(response, field)
+        except rfx.ResponseException as e:
+            return e.code
+        except (TypeError, ValueError):
+            return rfx.ResponseException.code
+        return 0
+
+
+def exact(value):
+    """
+    Returns a key for a response, or a value in one, that is only
+    equal to the key of an identical one: unlike the values themselves,
+    the keys of 1, 1.0 and True all differ, however deep in tuples,
+    lists or sets they are.  Raises TypeError if any value in it is
+    unhashable.
+    """
+    if isinstance(value, (tuple, list)):
+        return (type(value), tuple(map(exact, value)))
+    if isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(map(exact, value)))
+    return (type(value), value)
@@ -29,8 +29,11 @@ class ChooseNoMoreThan(abc.Abstract):
 
     def validate(self, responses, field):
         if not isinstance(responses, set):
-            raise rfx.ResponseException(self.__class__ + 'expects a set')
+            raise rfx.ResponseException(self.__class__.__name__ + ' expects a set')
         if len(responses) > self.maximum:
             raise rfx.WrongNumberOfChoices('limited to no more than %d choices' % (self.maximum))
         self.detect_duplicates(responses)
         self.validate_choices(responses, field)
+
+    def response(self, choices):
+        return set(choices)
@@ -5,66 +5,79 @@ from electionfraud.fraud import ElectionException
 class ResponseException(ElectionException):
     """
     Raised when the voter's response doesn't match what the response 
-    format requires.
+    format requires.  Each subclass has its own code, a small integer
+    standing for it in the reason codes of a batch validation (where 0
+    means valid); reason() maps a code back to the class.
     """
-    pass
+    code = 1
 
 class WrongNumberOfChoices(ResponseException):
     """
     Raised when the voter was asked to make a certain number of choices,
     but didn't comply.
     """
-    pass
+    code = 2
 
 class InvalidChoice(ResponseException):
     """
     Raised when the voter makes a choice that was not in the set of
     acceptable choices.
     """
-    pass
+    code = 3
 
 class DuplicateChoice(ResponseException):
     """
     Raised when the voter chooses something more than the rules permit.
     """
-    pass
+    code = 4
 
 class NonIntegerRating(ResponseException):
     """
     Raised when the voter provides something other than an integer 
     in their rating of a choice.
     """
-    pass
+    code = 5
 
 class NegativeRating(ResponseException):
     """
     Raised when the voter provides a negative integer in their rating
     of a choice.
     """
-    pass
+    code = 6
 
 class OverMaximumRating(ResponseException):
     """
     Raised when the voter chooses a number beyond the permitted maximum
     in their rating of a choice.
     """
-    pass
+    code = 7
 
 class OverBudget(ResponseException):
     """
     Raised when the voter exceeds their budget (sum of all ratings across 
     all choices).
     """
-    pass
+    code = 8
 
 class SelfPair(ResponseException):
     """
     Raised when the voter attempts to pairwise rank a choice against itself.
     """
-    pass
+    code = 9
 
 class MakeUpYourMind(ResponseException):
     """
     Raised when the voter attempts to pairwise rank two choices both ways.
     """
-    pass
+    code = 10
+
+REASONS = (None, ResponseException, WrongNumberOfChoices, InvalidChoice,
+           DuplicateChoice, NonIntegerRating, NegativeRating,
+           OverMaximumRating, OverBudget, SelfPair, MakeUpYourMind)
+
+def reason(code):
+    """
+    Returns the exception class a reason code stands for, or None for 0
+    (valid).
+    """
+    return REASONS[code]
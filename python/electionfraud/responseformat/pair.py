@@ -1,5 +1,9 @@
 # -*- python -*-
 
+import array
+import itertools
+import operator
+
 import electionfraud.responseformat.abc as abc
 import electionfraud.responseformat.exception as rfx
 
@@ -8,40 +12,96 @@ class Pairwise(abc.Abstract):
     A response format that states preferences in pairwise matchups.
     The response is expected to be a list of 2-tuples, with the higher
     preference as the first element.
+
+    Each ballot is checked on its own, so nothing is carried over from
+    one voter to the next.  Every proper pair of choices in the field,
+    either way round, is numbered once per field (for fields of up to
+    limit choices), so a ballot is checked by looking all of its pairs
+    up at once and seeing that no matchup comes up twice.  Only a
+    ballot that fails is gone over pair by pair, to report the first
+    problem in the order the pairs were stated.
     """
+
+    limit = 256
+
     def __init__(self):
-        self._tally = set()
+        self._field = None
+        self._matchups = None
+
+    def matchups(self, field):
+        """
+        Returns a mapping of every pair of different choices in the
+        field to a number for their matchup, the same for (x, y) and
+        (y, x), or None if the field is too big to be worth it.
+        """
+        field = frozenset(field)
+        if field != self._field:
+            n = len(field)
+            matchups = None
+            if n <= self.limit:
+                matchups = {}
+                for i, x in enumerate(field):
+                    for j, y in enumerate(field):
+                        if i != j:
+                            matchups[x, y] = min(i, j) * n + max(i, j)
+            self._field, self._matchups = field, matchups
+        return self._matchups
 
     def validate(self, responses, field):
-        for response in responses:
-            if not isinstance(response, tuple):
-                raise TypeError('responses must be tuples')
-            x, y = response
-            if x == y:
-                raise rfx.SelfPair('a choice must not be paired with itself')
+        if field is not None:
+            matchups = self.matchups(field)
+            if matchups is not None:
+                try:
+                    stated = list(map(matchups.__getitem__, responses))
+                except (KeyError, TypeError):
+                    pass
+                else:
+                    if len(set(stated)) == len(stated):
+                        return
+        if not all(map(isinstance, responses, itertools.repeat(tuple))):
+            raise TypeError('responses must be tuples')
+        if not set(map(len, responses)) <= {2}:
+            raise ValueError('responses must be pairs')
+        if any(map(operator.eq, map(operator.itemgetter(0), responses), map(operator.itemgetter(1), responses))):
+            raise rfx.SelfPair('a choice must not be paired with itself')
         self.validate_choices(responses, field)
         self.detect_duplicates(responses)
 
+    def validate_batch(self, responses, field=None):
+        """
+        As for the other formats, but without looking for identical
+        ballots: hashing a whole ballot of pairs costs as much as
+        checking it.
+        """
+        return array.array('b', [self.reason(x, field) for x in responses])
+
     def validate_choices(self, responses, field):
-        for response in responses:
-            x, y = response
-            if x not in field or y not in field:
+        if field is None:
+            return
+        for choice in set(itertools.chain.from_iterable(responses)):
+            if choice not in field:
                 raise rfx.InvalidChoice(choice, field)
-                
+
     def detect_duplicates(self, responses):
+        pairs = set(responses)
+        reverses = zip(map(operator.itemgetter(1), responses), map(operator.itemgetter(0), responses))
+        if len(pairs) == len(responses) and pairs.isdisjoint(reverses):
+            return
+        seen = set()
         for response in responses:
-            if response in self._tally:
+            if response in seen:
                 raise rfx.DuplicateChoice('already seen this response')
             x, y = response
-            esnopser = (y, x)
-            if esnopser in self._tally:
+            if (y, x) in seen:
                 raise rfx.MakeUpYourMind('already seen the reverse of this response')
-            self._tally.add(response)
+            seen.add(response)
 
 class AllPossiblePairwise(Pairwise):
     """
     A response format that states preferences in pairwise matchups.
-    All possible pairwise matchups must be mentioned.
+    All possible pairwise matchups must be mentioned: with the right
+    number of pairs, none repeated either way round, none of a choice
+    with itself and none outside the field, every matchup is there.
     The response is expected to be a list of 2-tuples, with the higher
     preference as the first element.
     """
@@ -25,11 +25,11 @@ class Ratings(abc.Abstract):
         self.validate_choices(responses, field)
         self.detect_duplicates(responses)
 
-    def validate_choices(responses, field):
+    def validate_choices(self, responses, field):
         altresponses = [ choice for choice, rating in responses ]
         super().validate_choices(altresponses, field)
 
-    def detect_duplicates(responses):
+    def detect_duplicates(self, responses):
         altresponses = [ choice for choice, rating in responses ]
         super().detect_duplicates(altresponses)
 
@@ -0,0 +1,53 @@
+# -*- python -*-
+
+"""
+Random number generators for anything in a count that is left to
+chance, e.g. redist.HareRandom.  Everything takes an explicit seed or
+generator rather than using the random module's global state, so that
+a recount with the same seed reproduces the original exactly, and
+workers in other processes can be handed streams of their own.
+"""
+
+import array
+import hashlib
+import random
+
+def generator(seed=None):
+    """
+    Returns a random.Random: seed itself if it is one already,
+    otherwise a new one seeded with it.  A seed of None seeds from the
+    operating system, so results will not be reproducible.
+    """
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
+
+def substream(seed, *path):
+    """
+    Returns a generator for one of any number of independent streams
+    derived from seed, identified by path, e.g. (recount, worker).
+    The same seed and path always give the same stream, in any
+    process.  If seed is a generator, one draw from it is taken as the
+    seed.
+    """
+    if isinstance(seed, random.Random):
+        seed = seed.getrandbits(256)
+    key = repr((seed,) + path).encode()
+    return random.Random(hashlib.sha512(key).digest())
+
+def spawn(seed, n):
+    """
+    Returns n independent generators derived from seed, one per worker.
+    """
+    if isinstance(seed, random.Random):
+        seed = seed.getrandbits(256)
+    return [substream(seed, i) for i in range(n)]
+
+def permutation(n, rng):
+    """
+    Returns a random ordering of range(n), generated all at once, as an
+    array.
+    """
+    order = list(range(n))
+    rng.shuffle(order)
+    return array.array('l', order)
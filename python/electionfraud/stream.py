@@ -0,0 +1,57 @@
+# -*- python -*-
+
+import collections.abc
+import contextlib
+import gc
+
+class BallotStream(collections.abc.Iterable):
+    """
+    A source of ballots that can be iterated over more than once
+    without ever being held in memory all at once, e.g. ballots read
+    from a file.  Each iteration calls factory(*args) afresh for a new
+    iterator, so multi-round count methods can make as many passes as
+    they need.
+    """
+
+    def __init__(self, factory, *args):
+        self.factory = factory
+        self.args = args
+
+    def __iter__(self):
+        return iter(self.factory(*self.args))
+
+
+def read_lines(path, decode, hint=1 << 20):
+    """
+    Yields decode(line) for every line of a text file, reading it
+    roughly hint bytes at a time.
+    """
+    with open(path) as f:
+        while True:
+            lines = f.readlines(hint)
+            if not lines:
+                return
+            for line in lines:
+                yield decode(line)
+
+def lines(path, decode, hint=1 << 20):
+    """
+    Returns a BallotStream over the decoded lines of a text file.
+    """
+    return BallotStream(read_lines, path, decode, hint)
+
+@contextlib.contextmanager
+def paused_gc():
+    """
+    Pauses the cyclic garbage collector for the duration, e.g. while
+    building a batch of ballots.  A batch is a great many new objects
+    that hold no cycles, and the collector would otherwise scan them
+    over and over as they pile up.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,105 @@
+# -*- python -*-
+
+import mmap
+import os
+import tempfile
+import unittest
+
+import electionfraud.testdata as eftd
+import electionfraud.ballotfile as ballotfile
+import electionfraud.countmethod.parallel as parallel
+import electionfraud.rankmatrix as rankmatrix
+
+import electionfraud.countmethod.borda as borda
+import electionfraud.countmethod.bucklin as bucklin
+import electionfraud.countmethod.fptp as fptp
+import electionfraud.countmethod.irv as irv
+
+
+class BallotFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.names = {str(x): x for x in eftd.TENNESSEE.keys()}
+        fd, self.path = tempfile.mkstemp('.ballots')
+        os.close(fd)
+        ballotfile.write(eftd.TN_IRV_100, self.path)
+        self.matrix = ballotfile.load(self.path, self.names)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+class TestBallotFile(BallotFileTest):
+
+    def test_roundtrip(self):
+        self.assertEqual(self.matrix.width, 4)
+        self.assertEqual(self.matrix.rows, 100)
+        self.assertEqual(list(self.matrix), eftd.TN_IRV_100)
+
+    def test_mapped(self):
+        self.assertIsInstance(self.matrix.ranks, memoryview)
+        self.assertIsInstance(self.matrix.ranks.obj, mmap.mmap)
+        self.assertTrue(self.matrix.ranks.readonly)
+        self.assertRaises(AttributeError, self.matrix.append, eftd.TN_IRV_100[0])
+
+    def test_weighted(self):
+        matrix = rankmatrix.RankMatrix(3)
+        matrix.append(eftd.ABC_CV_2[0][0:1], 5)
+        matrix.append([], 2)
+        ballotfile.dump(matrix, self.path)
+        loaded = ballotfile.load(self.path)
+        self.assertTrue(loaded.weighted)
+        self.assertEqual(len(loaded), 7)
+        self.assertEqual([str(x[0]) for x in loaded if x], [str(eftd.ABC_CV_2[0][0])] * 5)
+
+    def test_names(self):
+        self.assertEqual(self.matrix.choices, list(rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100).choices))
+        loaded = ballotfile.load(self.path)
+        self.assertEqual([str(x) for x in loaded.choices], [str(x) for x in self.matrix.choices])
+
+    def test_bad_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not ballots at all, not at all')
+        self.assertRaises(ValueError, ballotfile.load, self.path)
+        with open(self.path, 'wb') as f:
+            pass
+        self.assertRaises(ValueError, ballotfile.load, self.path)
+        matrix = rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100)
+        ballotfile.dump(matrix, self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 8)
+        self.assertRaises(ValueError, ballotfile.load, self.path)
+
+class TestMappedCount(BallotFileTest):
+
+    def test_fptp(self):
+        cm = fptp.FirstPastThePost()
+        cm.count(self.matrix)
+        expected = fptp.FirstPastThePost()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.results, expected.results)
+
+    def test_irv(self):
+        cm = irv.InstantRunoffVoting()
+        cm.count(self.matrix)
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.residue, expected.residue)
+
+    def test_bucklin(self):
+        cm = bucklin.Bucklin()
+        cm.count(self.matrix)
+        expected = bucklin.Bucklin()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.residue, expected.residue)
+        self.assertGreater(len(cm.residue), 1)
+
+    def test_borda_shards(self):
+        cm = borda.TraditionalBorda(4)
+        parallel.count(cm, self.matrix, 3)
+        expected = borda.TraditionalBorda(4)
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.results, expected.results)
+
+
+if __name__ == '__main__':
+    unittest.main()
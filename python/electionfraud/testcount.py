@@ -1,17 +1,31 @@
 # -*- python -*-
 
 import collections
+import fractions
+import functools
+import random
 import unittest
 
 import electionfraud.testdata as eftd
+import electionfraud.rankmatrix as rankmatrix
+import electionfraud.redist as redist
+import electionfraud.stream as stream
+
+from electionfraud.fraud import Choice
 
 import electionfraud.countmethod.borda as borda
+import electionfraud.countmethod.baldwin as baldwin
 import electionfraud.countmethod.bucklin as bucklin
+import electionfraud.countmethod.condorcet as condorcet
 import electionfraud.countmethod.contingent as cv
 import electionfraud.countmethod.coombs as coombs
 import electionfraud.countmethod.exception as cmx
 import electionfraud.countmethod.fptp as fptp
 import electionfraud.countmethod.irv as irv
+import electionfraud.countmethod.mrx as mrx
+import electionfraud.countmethod.nanson as nanson
+import electionfraud.countmethod.parallel as parallel
+import electionfraud.countmethod.stv as stv
 
 
 class CountMethodTest(unittest.TestCase):
@@ -32,6 +46,11 @@ class TestFPTP(CountMethodTest):
         for choice in eftd.TENNESSEE.keys():
             self.assertEqual(self.cm.results[choice], eftd.TENNESSEE[choice])
 
+    def test_fptp_matrix(self):
+        self.cm.count(rankmatrix.RankMatrix.from_responses(eftd.TN_FPTP_100))
+        self.assertEqual(self.cm.residue, len(eftd.TN_FPTP_100))
+        self.assertEqual(self.cm.results, eftd.TENNESSEE)
+
 class TestIRV(CountMethodTest):
     
     def setUp(self):
@@ -57,6 +76,101 @@ class TestIRV(CountMethodTest):
         self.assertEqual(self.cm.residue[2][eftd.memphis], 42)
         self.assertEqual(self.cm.residue[2][eftd.knoxville], 58)
 
+    def test_irv_deep(self):
+        # more rounds than the default recursion limit
+        field = [Choice('Write-in %d' % (x)) for x in range(1200)]
+        self.cm.count([[x] for x in field])
+        self.assertEqual(len(self.cm.residue), len(field))
+        self.assertEqual(len(self.cm.results), 1)
+
+class TestAggregatedIRV(CountMethodTest):
+
+    def setUp(self):
+        self.cm = irv.InstantRunoffVoting(aggregate=True)
+
+    def test_histogram(self):
+        histogram = mrx.RankingHistogram.from_responses(eftd.TN_IRV_100)
+        self.assertEqual(len(histogram), 4)
+        self.assertEqual(sum(histogram.values()), len(eftd.TN_IRV_100))
+        disqualified = histogram.disqualify(eftd.chattanooga)
+        self.assertEqual(len(disqualified), 3)
+        self.assertEqual(disqualified[(eftd.knoxville, eftd.nashville, eftd.memphis)], 32)
+
+    def test_aggregated_tennessee(self):
+        self.cm.count(eftd.TN_IRV_100)
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(len(self.cm.residue), len(expected.residue))
+        for ours, theirs in zip(self.cm.residue, expected.residue):
+            self.assertEqual(list(ours.items()), list(theirs.items()))
+        self.assertEqual(self.cm.results, self.cm.residue[-1])
+
+    def test_aggregated_matrix(self):
+        self.cm.count(rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100))
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.residue, expected.residue)
+
+class TestIncrementalIRV(CountMethodTest):
+
+    def setUp(self):
+        self.cm = irv.IncrementalInstantRunoffVoting()
+
+    def assertSameCount(self, responses):
+        expected = irv.InstantRunoffVoting()
+        expected.count(responses)
+        self.assertEqual(len(self.cm.residue), len(expected.residue))
+        for ours, theirs in zip(self.cm.residue, expected.residue):
+            self.assertEqual(list(ours.items()), list(theirs.items()))
+
+    def test_incremental_tennessee(self):
+        self.cm.count(eftd.TN_IRV_100)
+        self.assertSameCount(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.results, self.cm.residue[-1])
+
+    def test_incremental_truncated(self):
+        self.cm.count(eftd.ABCD_CV_3)
+        self.assertSameCount(eftd.ABCD_CV_3)
+
+    def test_incremental_ties(self):
+        # small fields and short ballots make for plenty of ties
+        rng = random.Random(2)
+        field = [eftd.a, eftd.b, eftd.c, eftd.d, eftd.A, eftd.B]
+        for trial in range(20):
+            responses = [rng.sample(field, rng.randint(1, 4)) for x in range(60)]
+            self.cm = irv.IncrementalInstantRunoffVoting()
+            self.cm.count(responses)
+            self.assertSameCount(responses)
+
+    def test_incremental_matrix(self):
+        self.cm.count(rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100))
+        self.assertSameCount(eftd.TN_IRV_100)
+
+class TestMatrixIRV(CountMethodTest):
+
+    def setUp(self):
+        self.cm = irv.InstantRunoffVoting()
+
+    def test_count_leaders(self):
+        matrix = rankmatrix.RankMatrix.from_responses(eftd.ABC_CV_2)
+        ours, ours_half = self.cm.count_leaders(matrix)
+        theirs, theirs_half = self.cm.count_leaders(eftd.ABC_CV_2)
+        self.assertEqual(ours_half, theirs_half)
+        self.assertEqual(list(ours.results.items()), list(theirs.results.items()))
+
+    def test_matrix_tennessee(self):
+        self.cm.count(rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100))
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.residue, expected.residue)
+
+    def test_matrix_coombs(self):
+        self.cm = coombs.CoombsMethod()
+        self.cm.count(rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100))
+        expected = coombs.CoombsMethod()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.residue, expected.residue)
+
 
 class TestCoombs(CountMethodTest):
 
@@ -86,6 +200,48 @@ class TestCoombs(CountMethodTest):
         self.assertEqual(trailers[eftd.knoxville], 68)
         self.assertEqual(trailers[eftd.nashville], 32)
 
+    def assertSameCount(self, responses):
+        # round by round, recounting whole ballots each time
+        expected = []
+        while True:
+            leaders, half = self.cm.count_leaders(responses)
+            trailers, _ = self.cm.count_trailers(responses)
+            expected.append((leaders.results, trailers.results))
+            if leaders.results[leaders.leader()] > half:
+                break
+            responses = self.cm.disqualify_all(responses, trailers.leader())
+        self.assertEqual(len(self.cm.residue), len(expected))
+        for ours, theirs in zip(self.cm.residue, expected):
+            for x, y in zip(ours, theirs):
+                self.assertEqual(list(x.items()), list(y.items()))
+
+    def test_untouched(self):
+        ballots = [list(x) for x in eftd.TN_IRV_100]
+        self.cm.count(ballots)
+        self.assertEqual(ballots, eftd.TN_IRV_100)
+        self.assertSameCount(eftd.TN_IRV_100)
+
+    def test_matrix_and_histogram(self):
+        self.cm.count(eftd.TN_IRV_100)
+        expected = self.cm.residue
+        for responses in (rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100),
+                          mrx.RankingHistogram.from_responses(eftd.TN_IRV_100)):
+            self.cm = coombs.CoombsMethod()
+            self.cm.count(responses)
+            self.assertEqual(self.cm.residue, expected)
+        self.cm = coombs.CoombsMethod(aggregate=True)
+        self.cm.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.residue, expected)
+
+    def test_random(self):
+        rng = random.Random(21)
+        field = [Choice('Coombs %d' % (x)) for x in range(6)]
+        for _ in range(20):
+            ballots = [rng.sample(field, rng.randint(1, 6)) for _ in range(50)]
+            self.cm = coombs.CoombsMethod()
+            self.cm.count(ballots)
+            self.assertSameCount(ballots)
+
 class TestContingent(CountMethodTest):
     
     def setUp(self):
@@ -116,6 +272,40 @@ class TestContingent(CountMethodTest):
         self.assertEqual(self.cm.residue[1][eftd.A], 73)
         self.assertEqual(self.cm.residue[1][eftd.D], 47)
 
+    def assertSameCount(self, ballots, responses, workers=None):
+        # against a recount of every ballot, requalified
+        self.cm = cv.ContingentVote(workers=workers)
+        self.cm.count(responses)
+        first_round, _ = self.cm.count_leaders(ballots)
+        expected = [first_round.results]
+        leaders = [x for x, _ in first_round.results.most_common(2)]
+        if len(self.cm.residue) > 1:
+            runoff, _ = self.cm.count_leaders(self.cm.requalify_all(ballots, leaders))
+            expected.append(runoff.results)
+        self.assertEqual(len(self.cm.residue), len(expected))
+        for ours, theirs in zip(self.cm.residue, expected):
+            self.assertEqual(list(ours.items()), list(theirs.items()))
+
+    def test_transfers_only(self):
+        rng = random.Random(23)
+        field = [eftd.a, eftd.b, eftd.c, eftd.d, eftd.A]
+        for _ in range(20):
+            ballots = [rng.sample(field, rng.randint(0, 3)) for _ in range(40)] + [[eftd.a]]
+            self.assertSameCount(ballots, ballots)
+            self.assertSameCount(ballots, rankmatrix.RankMatrix.from_responses(ballots))
+            self.assertSameCount(ballots, mrx.RankingHistogram.from_responses(ballots))
+            self.assertSameCount(ballots, iter(ballots))
+            self.assertSameCount(ballots, stream.BallotStream(functools.partial(iter, ballots)))
+
+    def test_sharded_transfers(self):
+        matrix = rankmatrix.RankMatrix.from_responses(eftd.ABCD_CV_3)
+        leaders = [eftd.D, eftd.A]
+        whole = self.cm.transfer(matrix, leaders)
+        self.assertEqual(whole, self.cm.transfer(eftd.ABCD_CV_3, leaders))
+        self.assertEqual(whole, parallel.transfer(self.cm, matrix, leaders, workers=1))
+        self.assertEqual(whole, parallel.transfer(self.cm, matrix, leaders, workers=3))
+        self.assertSameCount(eftd.ABCD_CV_3, matrix, workers=2)
+
 class TestTraditionalBorda(CountMethodTest):
 
     def setUp(self):
@@ -141,6 +331,197 @@ class TestTraditionalBorda(CountMethodTest):
         self.assertEqual(self.cm.result[eftd.c], 205)
         self.assertEqual(self.cm.result[eftd.d], 91)
 
+    def test_matrix(self):
+        self.cm = borda.TraditionalBorda(4)
+        self.cm.count(rankmatrix.RankMatrix.from_responses(eftd.ABCD_CV_4))
+        expected = borda.TraditionalBorda(4)
+        expected.count(eftd.ABCD_CV_4)
+        self.assertEqual(list(self.cm.result.items()), list(expected.result.items()))
+
+class TestParallel(CountMethodTest):
+
+    def setUp(self):
+        self.matrix = rankmatrix.RankMatrix.from_responses(eftd.ABCD_CV_4)
+
+    def test_fptp_shards(self):
+        self.cm = fptp.FirstPastThePost()
+        partials = [self.cm.partial(x) for x in self.matrix.shards(3)]
+        self.cm.merge(partials, self.matrix.choices)
+        expected = fptp.FirstPastThePost()
+        expected.count(eftd.ABCD_CV_4)
+        self.assertEqual(list(self.cm.results.items()), list(expected.results.items()))
+        self.assertEqual(self.cm.residue, expected.residue)
+
+    def test_fptp_pool(self):
+        self.cm = fptp.FirstPastThePost()
+        parallel.count(self.cm, eftd.TN_FPTP_100, workers=2)
+        self.assertEqual(list(self.cm.results.items()), list(eftd.TENNESSEE.items()))
+
+    def test_borda_pool(self):
+        self.cm = borda.TraditionalBorda(4)
+        parallel.count(self.cm, self.matrix, workers=3)
+        expected = borda.TraditionalBorda(4)
+        expected.count(eftd.ABCD_CV_4)
+        self.assertEqual(list(self.cm.results.items()), list(expected.results.items()))
+        self.assertEqual(self.cm.leader(), eftd.c)
+
+    def test_borda_pool_responses(self):
+        # each shard packs its own matrix, meeting the choices in its own order
+        expected = borda.TraditionalBorda(4)
+        expected.count(eftd.ABCD_CV_4)
+        for responses in (eftd.ABCD_CV_4, iter(eftd.ABCD_CV_4)):
+            self.cm = borda.TraditionalBorda(4)
+            parallel.count(self.cm, responses, workers=3)
+            self.assertEqual(list(self.cm.results.items()), list(expected.results.items()))
+
+    def test_borda_lists(self):
+        self.cm = borda.TraditionalBorda(4)
+        partials = [self.cm.partial(eftd.ABCD_CV_4[0:50]), self.cm.partial(eftd.ABCD_CV_4[50:])]
+        self.cm.merge(partials)
+        self.assertEqual(self.cm.results[eftd.a], 153)
+        self.assertEqual(self.cm.results[eftd.d], 91)
+
+class TestPrecinctSummaries(CountMethodTest):
+
+    def precincts(self, responses):
+        return [responses[0:7], responses[7:60], responses[60:]]
+
+    def assertSameCount(self, factory, responses):
+        self.cm = factory()
+        self.cm.merge([self.cm.partial(x) for x in self.precincts(responses)])
+        expected = factory()
+        expected.count(responses)
+        self.assertEqual(len(self.cm.residue), len(expected.residue))
+        for ours, theirs in zip(self.cm.residue, expected.residue):
+            self.assertEqual(ours, theirs)
+        self.assertEqual(self.cm.results, self.cm.residue[-1])
+
+    def test_irv(self):
+        self.assertSameCount(irv.InstantRunoffVoting, eftd.TN_IRV_100)
+
+    def test_incremental_irv(self):
+        self.assertSameCount(irv.IncrementalInstantRunoffVoting, eftd.TN_IRV_100)
+
+    def test_coombs(self):
+        self.assertSameCount(coombs.CoombsMethod, eftd.TN_IRV_100)
+
+    def test_contingent(self):
+        self.assertSameCount(cv.ContingentVote, eftd.ABC_CV_2)
+        self.assertSameCount(cv.ContingentVote, eftd.ABCD_CV_3)
+
+    def test_bucklin(self):
+        self.assertSameCount(bucklin.Bucklin, eftd.TN_IRV_100)
+
+    def test_matrix_summaries(self):
+        field = list(eftd.TENNESSEE.keys())
+        self.cm = irv.InstantRunoffVoting()
+        summaries = [self.cm.partial(rankmatrix.RankMatrix.from_responses(x, 4, field))
+                     for x in self.precincts(eftd.TN_IRV_100)]
+        self.cm.merge(summaries, field)
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.residue, expected.residue)
+
+    def test_separately_interned(self):
+        # each precinct's matrix gives the same choice a different id
+        field = list(eftd.TENNESSEE.keys())
+        self.cm = irv.InstantRunoffVoting()
+        summaries = [self.cm.partial(rankmatrix.RankMatrix.from_responses(x, 4, field[k:] + field[:k]))
+                     for k, x in enumerate(self.precincts(eftd.TN_IRV_100))]
+        self.cm.merge(summaries, field)
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.residue, expected.residue)
+        matrix = rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100)
+        self.assertRaises(ValueError, self.cm.merge, [matrix.count_rows()])
+        self.cm = irv.InstantRunoffVoting()
+        self.cm.merge([matrix.count_rows()], matrix.choices)
+        self.assertEqual(self.cm.residue, expected.residue)
+
+    def test_pool(self):
+        self.cm = coombs.CoombsMethod()
+        parallel.count(self.cm, eftd.TN_IRV_100, workers=2)
+        expected = coombs.CoombsMethod()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.residue, expected.residue)
+
+class TestPairwise(CountMethodTest):
+
+    def setUp(self):
+        self.cm = None
+
+    def pairs(self, responses):
+        return [[(x, y) for i, x in enumerate(response) for y in response[i + 1:]] for response in responses]
+
+    def test_premature(self):
+        self.cm = condorcet.Schulze()
+        self.assertRaises(cmx.IncompleteCount, self.cm.leader)
+
+    def test_preferences(self):
+        matrix = condorcet.PairwiseMatrix([eftd.memphis, eftd.nashville, eftd.chattanooga, eftd.knoxville])
+        matrix.add_rankings(eftd.TN_IRV_100)
+        d = matrix.preferences()
+        self.assertEqual(d[0], [0, 42, 42, 42])
+        self.assertEqual(d[1], [58, 0, 68, 68])
+        self.assertEqual(d[2][3], 83)
+        truncated = condorcet.PairwiseMatrix(matrix.choices)
+        truncated.add_rankings([x[0:3] for x in eftd.TN_IRV_100])
+        self.assertEqual(truncated.preferences(), d)
+
+    def test_condorcet(self):
+        self.cm = condorcet.Condorcet()
+        self.cm.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.leader(), eftd.nashville)
+        self.assertEqual(self.cm.trailer(), eftd.memphis)
+        self.cm.count([[eftd.a, eftd.b, eftd.c], [eftd.b, eftd.c, eftd.a], [eftd.c, eftd.a, eftd.b]])
+        self.assertEqual(self.cm.leader(), None)
+
+    def test_copeland(self):
+        self.cm = condorcet.Copeland()
+        self.cm.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.results[eftd.nashville], 3)
+        self.assertEqual(self.cm.results[eftd.chattanooga], 1)
+        self.assertEqual(self.cm.results[eftd.knoxville], -1)
+        self.assertEqual(self.cm.results[eftd.memphis], -3)
+
+    def test_schulze(self):
+        self.cm = condorcet.Schulze()
+        self.cm.count(eftd.ABCDE_SCHULZE_45)
+        self.assertEqual(self.cm.results, [eftd.E, eftd.A, eftd.C, eftd.B, eftd.D])
+        matrix = condorcet.PairwiseMatrix([eftd.A, eftd.B, eftd.C, eftd.D, eftd.E])
+        matrix.add_rankings(eftd.ABCDE_SCHULZE_45)
+        paths, results = matrix.schulze()
+        self.assertEqual(matrix.preferences()[0], [0, 20, 26, 30, 22])
+        self.assertEqual(paths[0], [0, 28, 28, 30, 24])
+        self.assertEqual(results, self.cm.results)
+
+    def test_ranked_pairs(self):
+        self.cm = condorcet.RankedPairs()
+        self.cm.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.results, [eftd.nashville, eftd.chattanooga, eftd.knoxville, eftd.memphis])
+        self.assertEqual(self.cm.locked[0], (eftd.chattanooga, eftd.knoxville))
+
+    def test_pairwise_ballots(self):
+        self.cm = condorcet.Schulze()
+        self.cm.count_pairs(self.pairs(eftd.ABCDE_SCHULZE_45))
+        expected = condorcet.Schulze()
+        expected.count(eftd.ABCDE_SCHULZE_45)
+        self.assertEqual(self.cm.results, expected.results)
+        self.assertEqual(self.cm.paths, expected.paths)
+
+    def test_merge(self):
+        self.cm = condorcet.RankedPairs()
+        responses = eftd.ABCDE_SCHULZE_45
+        self.cm.merge([self.cm.partial(responses[0:10]), self.cm.partial(responses[10:])])
+        expected = condorcet.RankedPairs()
+        expected.count(responses)
+        self.assertEqual(self.cm.results, expected.results)
+
+    def test_pool(self):
+        self.cm = condorcet.Schulze()
+        parallel.count(self.cm, eftd.ABCDE_SCHULZE_45, workers=3)
+        self.assertEqual(self.cm.results, [eftd.E, eftd.A, eftd.C, eftd.B, eftd.D])
+
 class TestBucklin(CountMethodTest):
 
     def setUp(self):
@@ -159,20 +540,159 @@ class TestBucklin(CountMethodTest):
         self.assertEqual(self.cm.residue[0][eftd.chattanooga], 15)
         self.assertEqual(self.cm.residue[0][eftd.knoxville], 17)
 
+    def assertSameCount(self, ballots, responses):
+        # each round against the top preferences counted from scratch
+        self.cm = bucklin.Bucklin()
+        self.cm.count(responses)
+        for rd, ours in enumerate(self.cm.residue):
+            theirs, _ = self.cm.bucklin_leaders(1 + rd, ballots)
+            self.assertEqual(list(ours.items()), list(theirs.results.items()))
+        self.assertEqual(self.cm.results, self.cm.residue[-1])
+
+    def test_running_tally(self):
+        rng = random.Random(22)
+        field = [Choice('Bucklin %d' % (x)) for x in range(6)]
+        for _ in range(20):
+            ballots = [rng.sample(field, rng.randint(0, 6)) for _ in range(40)] + [field[0:1]]
+            self.assertSameCount(ballots, ballots)
+            self.assertSameCount(ballots, rankmatrix.RankMatrix.from_responses(ballots))
+            self.assertSameCount(ballots, mrx.RankingHistogram.from_responses(ballots))
+            self.assertSameCount(ballots, iter(ballots))
+
+    def test_earlier_ballot_later_rank(self):
+        # in round 2, c is first met at rank 2 of the first ballot,
+        # ahead of b, which is first met on the second ballot
+        ballots = [[eftd.a, eftd.c], [eftd.b, eftd.a], [eftd.c, eftd.b]]
+        self.assertSameCount(ballots, ballots)
+        self.assertEqual(list(self.cm.residue[1]), [eftd.a, eftd.c, eftd.b])
+
 class TestSTV(CountMethodTest):
 
     def setUp(self):
-        pass
+        self.cm = stv.GregorySTV(3)
+
+    def test_premature(self):
+        self.assertRaises(cmx.IncompleteCount, self.cm.leader)
 
     def test_party_foods(self):
-        self.skipTest('results and residue formats not determined')
-        self.cm = stv.SingleTransferableVote(5, 3)
         self.cm.count(eftd.FOOD_STV_20)
+        self.assertEqual(self.cm.results, [eftd.chocolate, eftd.orange, eftd.strawberry])
+        self.assertEqual(self.cm.residue[0][eftd.chocolate], 12)
+        self.assertEqual(self.cm.residue[1][eftd.chocolate], 6)
+        self.assertEqual(self.cm.residue[1][eftd.strawberry], 5)
+        self.assertEqual(self.cm.residue[1][eftd.sweets], 3)
+
+    def test_party_foods_meek(self):
+        self.cm = stv.MeekSTV(3, stv.ExactArithmetic())
+        self.cm.count(eftd.FOOD_STV_20)
+        self.assertEqual(set(self.cm.results), set([eftd.chocolate, eftd.orange, eftd.strawberry]))
+        self.assertAlmostEqual(float(self.cm.residue[1][eftd.chocolate]), 5, places=6)
 
     def test_abcd(self):
-        self.skipTest('results and residue formats not determined')
-        self.cm = stv.SingleTransferableVote(4, 3)
-        self.cm.count(eftd.ABCD_STV_57)
+        for cm in (stv.GregorySTV(2), stv.MeekSTV(2)):
+            cm.count(eftd.ABCD_STV_57)
+            self.assertEqual(cm.results, [eftd.A, eftd.C])
+        self.assertAlmostEqual(float(cm.residue[1][eftd.B]), 8.4, places=6)
+
+    def test_exact_and_fixed(self):
+        rng = random.Random(4)
+        field = [Choice('Candidate %d' % (x)) for x in range(8)]
+        responses = [rng.sample(field, rng.randint(1, 8)) for x in range(500)]
+        for method in (stv.GregorySTV, stv.MeekSTV):
+            exact = method(3, stv.ExactArithmetic())
+            exact.count(responses)
+            fixed = method(3, stv.FixedPointArithmetic())
+            fixed.count(rankmatrix.RankMatrix.from_responses(responses))
+            self.assertEqual(exact.results, fixed.results)
+            for x, y in zip(exact.residue, fixed.residue):
+                for choice in x:
+                    self.assertAlmostEqual(float(x[choice]), float(y[choice]), places=5)
+
+    def test_meek_groups(self):
+        # every elected candidate on a ballot takes its keep value's
+        # share, even one ranked below a candidate elected later
+        self.cm = stv.MeekSTV(3, stv.ExactArithmetic())
+        responses = [[eftd.a, eftd.b, eftd.c]] * 10 + [[eftd.b, eftd.a, eftd.d]] * 10 + [[eftd.c]] * 6 + [[eftd.d]] * 5
+        self.cm.count(responses)
+        self.assertEqual(self.cm.results[0:2], [eftd.a, eftd.b])
+        keep = self.cm.keep
+        self.assertLess(keep[eftd.b], 1)
+        votes = self.cm.residue[-1]
+        self.assertEqual(votes[eftd.a], 10 * keep[eftd.a] + 10 * (1 - keep[eftd.b]) * keep[eftd.a])
+
+class TestWholeBallotSTV(CountMethodTest):
+
+    def setUp(self):
+        self.cm = stv.WholeBallotSTV(3)
+
+    def test_premature(self):
+        self.assertRaises(cmx.IncompleteCount, self.cm.leader)
+
+    def test_identity(self):
+        self.cm = stv.WholeBallotSTV(3, redist.Identity)
+        self.cm.count(eftd.FOOD_STV_20)
+        self.assertEqual(self.cm.results, [eftd.chocolate, eftd.strawberry, eftd.orange])
+        self.assertEqual(self.cm.residue[1][eftd.chocolate], 6)
+        self.assertEqual(self.cm.residue[1][eftd.strawberry], 7)
+
+    def test_cincinnati(self):
+        # every 11th of the 12 Chocolate ballots counts back from the
+        # end of the pile, where the Sweets second choices are
+        self.cm.count(eftd.FOOD_STV_20)
+        self.assertEqual(self.cm.results, [eftd.chocolate, eftd.orange, eftd.strawberry])
+        self.assertEqual(self.cm.residue[1][eftd.sweets], 4)
+        self.assertEqual(self.cm.residue[1][eftd.strawberry], 4)
+
+    def test_hare(self):
+        rng = random.Random(11)
+        field = [Choice('Candidate %d' % (x)) for x in range(12)]
+        responses = [rng.sample(field, rng.randint(1, 5)) for x in range(5000)]
+        quota = self.cm.droop(5000)
+        for rd in (redist.HareRandom, None):
+            self.cm = stv.WholeBallotSTV(4, rd)
+            self.cm.count(responses)
+            self.assertEqual(len(self.cm.results), 4)
+            for stage in self.cm.residue:
+                self.assertLessEqual(sum(stage.values()), 5000)
+            for choice in self.cm.results[0:-1]:
+                self.assertLessEqual(self.cm.residue[-1][choice], quota)
+
+    def test_hare_recount(self):
+        rng = random.Random(12)
+        field = [Choice('Candidate %d' % (x)) for x in range(12)]
+        responses = [rng.sample(field, rng.randint(1, 5)) for x in range(2000)]
+        counts = list()
+        for i in range(2):
+            self.cm = stv.WholeBallotSTV(4, functools.partial(redist.HareRandom, seed=random.Random(2011)))
+            self.cm.count(responses)
+            counts.append(self.cm.residue)
+        self.assertEqual(counts[0], counts[1])
+
+class TestBordaPoints(CountMethodTest):
+
+    def test_points(self):
+        self.assertEqual(borda.TraditionalBorda(4).vector(3), (3, 2, 1))
+        self.assertEqual(borda.KiribatiBorda(4).vector(3), (4, 3, 2))
+        self.assertEqual(borda.NauruBorda().vector(3), (1, 1/2, 1/3))
+        self.assertEqual(borda.ModifiedBorda().vector(3), (3, 2, 1))
+        self.assertEqual(borda.ModifiedBorda().vector(2), (2, 1))
+        self.assertEqual(borda.TraditionalBorda(4).transform([eftd.b, eftd.a]), {eftd.b: 3, eftd.a: 2})
+
+    def test_matrix(self):
+        # truncated ballots, where ModifiedBorda's points depend on
+        # their length
+        rng = random.Random(24)
+        field = [eftd.a, eftd.b, eftd.c, eftd.d, eftd.A]
+        responses = [rng.sample(field, rng.randint(0, 5)) for x in range(200)]
+        for factory in (functools.partial(borda.TraditionalBorda, 5), functools.partial(borda.KiribatiBorda, 5), borda.ModifiedBorda):
+            expected = factory()
+            expected.count(responses)
+            self.cm = factory()
+            self.cm.count(rankmatrix.RankMatrix.from_responses(responses))
+            self.assertEqual(list(self.cm.results.items()), list(expected.results.items()))
+            self.cm = factory()
+            self.cm.merge([self.cm.partial(responses[0:50]), self.cm.partial(responses[50:])])
+            self.assertEqual(list(self.cm.results.items()), list(expected.results.items()))
 
 class TestNauruBorda(CountMethodTest):
 
@@ -182,6 +702,27 @@ class TestNauruBorda(CountMethodTest):
     def test_nauru(self):
         self.skipTest('no test case found yet')
 
+    def test_exact(self):
+        self.cm = borda.NauruBorda(exact=True)
+        self.assertEqual(self.cm.transform([eftd.a, eftd.b, eftd.c]), {eftd.a: 1, eftd.b: fractions.Fraction(1, 2), eftd.c: fractions.Fraction(1, 3)})
+        rng = random.Random(25)
+        field = [Choice('Nauru %d' % (x)) for x in range(12)]
+        responses = [rng.sample(field, 12) for x in range(300)]
+        expected = collections.Counter()
+        for response in responses:
+            for rank, choice in enumerate(response):
+                expected[choice] += fractions.Fraction(1, 1 + rank)
+        self.cm.count(responses)
+        self.assertEqual(self.cm.results, expected)
+        serial = list(self.cm.results.items())
+        matrix = rankmatrix.RankMatrix.from_responses(responses)
+        self.cm = borda.NauruBorda(exact=True)
+        self.cm.merge([self.cm.partial(x) for x in matrix.shards(7)], matrix.choices)
+        self.assertEqual(list(self.cm.results.items()), serial)
+        self.cm = borda.NauruBorda(exact=True)
+        self.cm.merge([self.cm.partial(responses[0:13]), self.cm.partial(responses[13:])])
+        self.assertEqual(list(self.cm.results.items()), serial)
+
 class TestKiribatiBorda(CountMethodTest):
     
     def setUp(self):
@@ -198,21 +739,91 @@ class TestModifiedBorda(CountMethodTest):
     def test_modified(self):
         self.skipTest('no test case found yet')
 
+class TestBordaScoreTable(CountMethodTest):
+
+    def setUp(self):
+        rng = random.Random(9)
+        self.field = [Choice('Candidate %d' % (x)) for x in range(30)]
+        self.responses = [rng.sample(self.field, rng.randint(1, 30)) for x in range(300)]
+
+    def assertFollowsRecount(self, table, factory):
+        responses = self.responses
+        while len(table.scores) > 1:
+            last, _ = table.scores.most_common()[-1]
+            table.eliminate(last)
+            responses = [[x for x in response if x != last] for response in responses]
+            expected = factory(len(table.scores))
+            expected.count(responses)
+            self.assertEqual(table.scores, expected.results)
+
+    def test_traditional(self):
+        table = borda.TraditionalScoreTable.from_responses(self.responses, 30)
+        expected = borda.TraditionalBorda(30)
+        expected.count(self.responses)
+        self.assertEqual(table.scores, expected.results)
+        self.assertFollowsRecount(table, borda.TraditionalBorda)
+
+    def test_modified(self):
+        table = borda.ModifiedScoreTable.from_responses(self.responses)
+        expected = borda.ModifiedBorda()
+        expected.count(self.responses)
+        self.assertEqual(table.scores, expected.results)
+        self.assertFollowsRecount(table, lambda x: borda.ModifiedBorda())
+
+    def test_matrix(self):
+        matrix = rankmatrix.RankMatrix.from_responses(self.responses)
+        weighted = rankmatrix.RankMatrix(30)
+        for ranking, weight in mrx.RankingHistogram.from_responses(self.responses + self.responses[0:50]).items():
+            weighted.append(ranking, weight)
+        for cls, factory in ((borda.TraditionalScoreTable, borda.TraditionalBorda),
+                             (borda.ModifiedScoreTable, lambda x: borda.ModifiedBorda())):
+            self.assertFollowsRecount(cls.from_responses(matrix), factory)
+            table = cls.from_responses(weighted)
+            expected = cls.from_responses(self.responses + self.responses[0:50])
+            while len(table.scores) > 1:
+                self.assertEqual(list(table.scores.items()), list(expected.scores.items()))
+                last, _ = table.scores.most_common()[-1]
+                table.eliminate(last)
+                expected.eliminate(last)
+
 class TestBaldwin(CountMethodTest):
 
     def setUp(self):
-        pass
+        self.cm = baldwin.BaldwinTraditional(4)
 
-    def test_baldwin_placeholder(self):
-        self.skipTest('poor description of method, no test case found yet')
+    def test_premature(self):
+        self.assertRaises(cmx.IncompleteCount, self.cm.leader)
+
+    def test_baldwin_tennessee(self):
+        self.cm.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.leader(), eftd.nashville)
+        self.assertEqual(self.cm.trailer(), eftd.knoxville)
+        self.assertEqual(self.cm.residue[1][eftd.nashville], 126)
+        self.assertEqual(self.cm.residue[1][eftd.chattanooga], 90)
+        self.assertEqual(self.cm.residue[1][eftd.memphis], 84)
+        self.assertEqual(len(self.cm.residue), 4)
+
+    def test_baldwin_modified(self):
+        self.cm = baldwin.BaldwinModified()
+        self.cm.count(rankmatrix.RankMatrix.from_responses(eftd.ABCD_CV_4))
+        self.assertEqual(self.cm.leader(), eftd.a)
+        self.assertEqual(self.cm.residue[2][eftd.c], 149)
 
 class TestNanson(CountMethodTest):
 
     def setUp(self):
-        pass
+        self.cm = nanson.Nanson()
 
-    def test_nanson_placeholder(self):
-        self.skipTest('poor description of method, no test case found yet')
+    def test_nanson_tennessee(self):
+        self.cm.count(eftd.TN_IRV_100)
+        self.assertEqual(self.cm.leader(), eftd.nashville)
+        self.assertEqual(len(self.cm.residue), 3)
+        self.assertEqual(list(self.cm.residue[1].keys()), [eftd.nashville, eftd.chattanooga])
+
+    def test_nanson_tie(self):
+        self.cm.count([[eftd.a, eftd.b, eftd.c], [eftd.b, eftd.c, eftd.a], [eftd.c, eftd.a, eftd.b]])
+        self.assertEqual(len(self.cm.residue), 1)
+        self.assertEqual(len(self.cm.results), 3)
 
 if __name__ == '__main__':
     unittest.main()
@@ -53,6 +53,19 @@ ABCD_CV_4 = ABCD_CV_4 + [[c, b, d, a]] * 5
 ABCD_CV_4 = ABCD_CV_4 + [[b, c, d, a]] * 23
 ABCD_CV_4 = ABCD_CV_4 + [[d, c, b, a]] * 21
 
+# http://en.wikipedia.org/wiki/Schulze_method
+
+E = Choice('Emmett')
+
+ABCDE_SCHULZE_45 = [[A, C, B, E, D]] * 5
+ABCDE_SCHULZE_45 = ABCDE_SCHULZE_45 + [[A, D, E, C, B]] * 5
+ABCDE_SCHULZE_45 = ABCDE_SCHULZE_45 + [[B, E, D, A, C]] * 8
+ABCDE_SCHULZE_45 = ABCDE_SCHULZE_45 + [[C, A, B, E, D]] * 3
+ABCDE_SCHULZE_45 = ABCDE_SCHULZE_45 + [[C, A, E, B, D]] * 7
+ABCDE_SCHULZE_45 = ABCDE_SCHULZE_45 + [[C, B, A, D, E]] * 2
+ABCDE_SCHULZE_45 = ABCDE_SCHULZE_45 + [[D, C, E, B, A]] * 7
+ABCDE_SCHULZE_45 = ABCDE_SCHULZE_45 + [[E, B, A, D, C]] * 8
+
 # http://en.wikipedia.org/wiki/Borda_count
 
 # http://en.wikipedia.org/wiki/Single_Transferable_Vote
@@ -0,0 +1,38 @@
+# -*- python -*-
+
+import collections
+import copy
+import pickle
+import unittest
+
+import electionfraud.testdata as eftd
+from electionfraud.fraud import Choice
+
+
+class TestChoice(unittest.TestCase):
+
+    def test_interned(self):
+        self.assertIs(Choice('Memphis'), eftd.memphis)
+        self.assertEqual(Choice('Memphis'), eftd.memphis)
+        self.assertNotEqual(Choice('Memphis'), Choice('Nashville'))
+        tally = collections.Counter([Choice('Memphis'), eftd.memphis])
+        self.assertEqual(tally, collections.Counter({eftd.memphis: 2}))
+
+    def test_id(self):
+        choice = Choice('Test choice %d' % (len(Choice._by_id)))
+        self.assertIs(Choice.from_id(choice.id), choice)
+        self.assertEqual(Choice('A fresh test choice').id, choice.id + 1)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(eftd.memphis, '__dict__'))
+        self.assertRaises(AttributeError, setattr, eftd.memphis, 'colour', 'blue')
+
+    def test_pickle(self):
+        self.assertIs(pickle.loads(pickle.dumps(eftd.memphis)), eftd.memphis)
+        self.assertIs(copy.deepcopy(eftd.memphis), eftd.memphis)
+        ballots = pickle.loads(pickle.dumps(eftd.TN_IRV_100))
+        self.assertEqual(ballots, eftd.TN_IRV_100)
+
+
+if __name__ == '__main__':
+    unittest.main()
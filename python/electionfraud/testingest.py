@@ -0,0 +1,144 @@
+# -*- python -*-
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+import electionfraud.testdata as eftd
+import electionfraud.ingest as ingest
+
+import electionfraud.countmethod.borda as borda
+import electionfraud.countmethod.fptp as fptp
+import electionfraud.countmethod.irv as irv
+
+
+class IngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.names = {str(x): x for x in eftd.TENNESSEE.keys()}
+        self.paths = []
+
+    def tearDown(self):
+        for path in self.paths:
+            os.unlink(path)
+
+    def write(self, suffix):
+        fd, path = tempfile.mkstemp(suffix)
+        self.paths.append(path)
+        return os.fdopen(fd, 'w', newline='')
+
+    def write_csv(self, responses, width=4):
+        with self.write('.csv') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id'] + ['rank %d' % (1 + k) for k in range(width)])
+            for k, response in enumerate(responses):
+                writer.writerow([k] + [str(x) for x in response] + [''] * (width - len(response)))
+        return self.paths[-1]
+
+    def write_jsonl(self, responses, key=None):
+        with self.write('.jsonl') as f:
+            for k, response in enumerate(responses):
+                ranking = [str(x) for x in response]
+                f.write(json.dumps(ranking if key is None else {'id': k, key: ranking}) + '\n')
+            f.write('\n')
+        return self.paths[-1]
+
+class TestChoiceTable(IngestTest):
+
+    def test_intern(self):
+        table = ingest.ChoiceTable()
+        self.assertIs(table['Memphis'], table['Memphis'])
+        self.assertEqual(str(table['Memphis']), 'Memphis')
+        table = ingest.ChoiceTable(self.names)
+        self.assertIs(table['Memphis'], eftd.memphis)
+
+    def test_ballots(self):
+        table = ingest.ChoiceTable(self.names, limit=1)
+        rankings = [('Memphis', '', 'Knoxville'), ('Nashville',), ('Memphis', '', 'Knoxville')]
+        ballots = table.ballots(rankings)
+        self.assertEqual(ballots, [[eftd.memphis, eftd.knoxville], [eftd.nashville], [eftd.memphis, eftd.knoxville]])
+        self.assertIsNot(ballots[0], ballots[2])
+        self.assertEqual(len(table.rankings[frozenset([''])]), 1)
+        self.assertEqual(table.ballots([('Memphis', 'overvote')], skip=('overvote',)), [[eftd.memphis]])
+
+    def test_skip(self):
+        # the same ranking makes a different ballot for each set of names skipped
+        table = ingest.ChoiceTable(self.names)
+        rankings = [('Memphis', '', 'Knoxville')]
+        self.assertEqual(table.ballots(rankings), [[eftd.memphis, eftd.knoxville]])
+        self.assertEqual(table.ballots(rankings, skip=('Knoxville',)), [[eftd.memphis, table['']]])
+        self.assertEqual(table.ballots(rankings, skip=('', 'Memphis')), [[eftd.knoxville]])
+        self.assertEqual(table.ballots(rankings), [[eftd.memphis, eftd.knoxville]])
+
+class TestCSV(IngestTest):
+
+    def test_batches(self):
+        path = self.write_csv(eftd.TN_IRV_100)
+        table = ingest.ChoiceTable(self.names)
+        batches = list(ingest.csv_batches(path, table, header=True, columns=slice(1, None), size=30))
+        self.assertEqual([len(x) for x in batches], [30, 30, 30, 10])
+        self.assertEqual(list(ingest.ballots(batches)), eftd.TN_IRV_100)
+
+    def test_truncated(self):
+        responses = [x[0:k] for k, x in enumerate(eftd.TN_IRV_100[::10])]
+        path = self.write_csv(responses)
+        ballots = ingest.ballots(ingest.csv_batches(path, ingest.ChoiceTable(self.names), header=True, columns=slice(1, None)))
+        self.assertEqual(list(ballots), responses)
+
+    def test_fptp(self):
+        path = self.write_csv([x[0:1] for x in eftd.TN_IRV_100], width=1)
+        cm = fptp.FirstPastThePost()
+        batches = ingest.csv_batches(path, ingest.ChoiceTable(self.names), header=True, columns=slice(1, None), size=7)
+        cm.merge([cm.partial(x) for x in batches])
+        self.assertEqual(cm.results, eftd.TENNESSEE)
+
+    def test_irv_stream(self):
+        path = self.write_csv(eftd.TN_IRV_100)
+        ballots = ingest.csv_ballots(path, ingest.ChoiceTable(self.names), header=True, columns=slice(1, None))
+        cm = irv.InstantRunoffVoting()
+        cm.count(ballots)
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.residue, expected.residue)
+
+    def test_borda_matrices(self):
+        path = self.write_csv(eftd.TN_IRV_100)
+        batches = ingest.csv_batches(path, ingest.ChoiceTable(self.names), header=True, columns=slice(1, None), size=16)
+        matrices = list(ingest.matrices(batches, 4))
+        self.assertEqual(len(matrices), 7)
+        self.assertIs(matrices[0].ids, matrices[-1].ids)
+        cm = borda.TraditionalBorda(4)
+        cm.merge([cm.partial(x) for x in matrices], matrices[0].choices)
+        expected = borda.TraditionalBorda(4)
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.results, expected.results)
+
+class TestJSONLines(IngestTest):
+
+    def test_batches(self):
+        path = self.write_jsonl(eftd.TN_IRV_100)
+        batches = list(ingest.jsonl_batches(path, ingest.ChoiceTable(self.names), size=64))
+        self.assertEqual([len(x) for x in batches], [64, 36])
+        self.assertEqual(list(ingest.ballots(batches)), eftd.TN_IRV_100)
+
+    def test_key(self):
+        path = self.write_jsonl(eftd.TN_IRV_100, key='ranking')
+        ballots = ingest.jsonl_ballots(path, ingest.ChoiceTable(self.names), key='ranking')
+        self.assertEqual(list(ballots), eftd.TN_IRV_100)
+        self.assertEqual(list(ballots), eftd.TN_IRV_100)
+
+    def test_interned(self):
+        path = self.write_jsonl(eftd.TN_IRV_100)
+        table = ingest.ChoiceTable()
+        ballots = list(ingest.jsonl_ballots(path, table))
+        self.assertEqual(sorted(table.keys()), sorted(self.names.keys()))
+        self.assertIs(ballots[0][0], ballots[1][0])
+        cm = fptp.FirstPastThePost()
+        cm.count(x[0:1] for x in ballots)
+        self.assertEqual(cm.results[table['Memphis']], 42)
+
+
+if __name__ == '__main__':
+    unittest.main()
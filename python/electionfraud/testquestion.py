@@ -0,0 +1,107 @@
+# -*- python -*-
+
+import datetime
+import unittest
+
+import electionfraud.testdata as eftd
+from electionfraud.Ballot import Ballot
+from electionfraud.Election import Election
+from electionfraud.Question import Question
+from electionfraud.Voter import Voter
+from electionfraud.fraud import ElectionException
+
+import electionfraud.countmethod.borda as borda
+import electionfraud.countmethod.fptp as fptp
+import electionfraud.countmethod.irv as irv
+import electionfraud.countmethod.stv as stv
+import electionfraud.responseformat.exception as rfx
+import electionfraud.responseformat.rank as rank
+
+
+class QuestionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.field = set(eftd.TENNESSEE.keys())
+        memphis, nashville, _, _ = eftd.TENNESSEE.keys()
+        self.spoilers = [[memphis, memphis], [eftd.E], [nashville, nashville, memphis]]
+
+    def ballotbox(self, question, responses):
+        ballotbox = {Voter(): None}
+        for response in responses:
+            voter = Voter()
+            ballot = Ballot()
+            ballot[question] = response
+            ballotbox[voter] = (voter, ballot)
+        ballotbox[Voter()] = (None, Ballot())
+        return ballotbox
+
+    def mixed(self, responses):
+        mixed = list(responses)
+        for k, spoiler in enumerate(self.spoilers):
+            mixed.insert(7 * k + 3, spoiler)
+        return mixed
+
+    def assertSpoiled(self, question):
+        self.assertEqual([x for x, _ in question.spoiled], self.spoilers)
+        self.assertEqual([type(e) for _, e in question.spoiled], [rfx.DuplicateChoice, rfx.InvalidChoice, rfx.DuplicateChoice])
+
+class TestResolve(QuestionTest):
+
+    def resolve(self, countmethod, responses, workers):
+        q = Question(self.field, responseformat=rank.RankInOrderOfPreference(), countmethod=countmethod)
+        results = q.resolve(self.ballotbox(q, self.mixed(responses)), workers)
+        self.assertSpoiled(q)
+        return results
+
+    def test_plurality(self):
+        for workers in (None, 2, 3):
+            results = self.resolve(fptp.FirstPastThePost(), eftd.TN_FPTP_100, workers)
+            self.assertEqual(results, eftd.TENNESSEE)
+
+    def test_borda(self):
+        expected = borda.TraditionalBorda(4)
+        expected.count(eftd.TN_IRV_100)
+        for workers in (None, 2, 3):
+            results = self.resolve(borda.TraditionalBorda(4), eftd.TN_IRV_100, workers)
+            self.assertEqual(results, expected.results)
+
+    def test_unmergeable(self):
+        expected = stv.GregorySTV(2)
+        expected.count(eftd.TN_IRV_100)
+        results = self.resolve(stv.GregorySTV(2), eftd.TN_IRV_100, 2)
+        self.assertEqual(results, expected.results)
+
+    def test_twice(self):
+        for countmethod in (fptp.FirstPastThePost(), irv.InstantRunoffVoting()):
+            q = Question(self.field, responseformat=rank.RankInOrderOfPreference(), countmethod=countmethod)
+            ballotbox = self.ballotbox(q, self.mixed(eftd.TN_IRV_100))
+            for workers in (None, 2, None):
+                q.resolve(ballotbox, workers)
+                self.assertSpoiled(q)
+            expected = type(countmethod)()
+            expected.count(eftd.TN_IRV_100)
+            self.assertEqual(q.results, expected.results)
+            self.assertEqual(countmethod.residue, expected.residue)
+
+class TestElection(QuestionTest):
+
+    def test_resolve(self):
+        now = datetime.datetime.now()
+        election = Election(polls=(now - datetime.timedelta(hours=1), now + datetime.timedelta(hours=1)))
+        q = Question(self.field, responseformat=rank.RankInOrderOfPreference(), countmethod=fptp.FirstPastThePost())
+        election.questions.append(q)
+        for response in self.mixed(eftd.TN_FPTP_100):
+            voter = Voter()
+            election.register_voter(voter)
+            ballot = Ballot()
+            ballot[q] = response
+            election.vote_at_polling_place(voter, ballot)
+        self.assertRaises(ElectionException, election.vote_at_polling_place, voter, ballot)
+        self.assertRaises(ElectionException, election.vote_absentee, voter, ballot)
+        election.resolve(workers=2)
+        self.assertEqual(election.results[q], eftd.TENNESSEE)
+        self.assertSpoiled(q)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- python -*-
+
+import collections
+import random
+import unittest
+
+import electionfraud.testdata as eftd
+import electionfraud.rankmatrix as rankmatrix
+from electionfraud.fraud import Choice
+
+
+class RankMatrixTest(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100)
+
+class TestRankMatrix(RankMatrixTest):
+
+    def test_shape(self):
+        self.assertEqual(self.matrix.width, 4)
+        self.assertEqual(self.matrix.rows, 100)
+        self.assertEqual(len(self.matrix), 100)
+        self.assertEqual(len(self.matrix.choices), 4)
+        self.assertEqual(len(self.matrix.ranks), 400)
+
+    def test_roundtrip(self):
+        self.assertEqual(list(self.matrix), eftd.TN_IRV_100)
+
+    def test_padding(self):
+        matrix = rankmatrix.RankMatrix.from_responses(eftd.ABC_CV_2, width=3)
+        self.assertEqual(list(matrix.column(2)), [rankmatrix.RankMatrix.PAD] * 100)
+        self.assertEqual(list(matrix), eftd.ABC_CV_2)
+        self.assertRaises(ValueError, matrix.append, eftd.TN_IRV_100[0])
+
+    def test_shared_ids(self):
+        choices = [eftd.knoxville, eftd.memphis]
+        matrix = rankmatrix.RankMatrix.from_responses(eftd.TN_IRV_100, choices=choices)
+        self.assertEqual(matrix.choices[0:2], choices)
+        self.assertEqual(list(matrix), eftd.TN_IRV_100)
+
+    def test_tally(self):
+        first = self.matrix.tally(0)
+        self.assertEqual(first, eftd.TENNESSEE)
+        self.assertEqual(list(first.keys()), list(eftd.TENNESSEE.keys()))
+        everything = self.matrix.tally()
+        for choice in eftd.TENNESSEE.keys():
+            self.assertEqual(everything[choice], 100)
+
+    def test_count_ids(self):
+        # either side of FEW choices, the ids are counted and ordered
+        # as a Counter of the column would count and order them
+        rng = random.Random(24)
+        for size in (3, rankmatrix.RankMatrix.FEW, rankmatrix.RankMatrix.FEW + 1):
+            field = [Choice('Column %d' % (x)) for x in range(size)]
+            matrix = rankmatrix.RankMatrix.from_responses([rng.sample(field, rng.randint(0, 3)) for x in range(50)], 3)
+            for rank in (None, 0, 1, 2):
+                expected = collections.Counter(matrix.ranks if rank is None else matrix.column(rank))
+                del expected[matrix.PAD]
+                self.assertEqual(list(matrix.count_ids(rank).items()), list(expected.items()))
+
+    def test_count_rows(self):
+        rows = self.matrix.count_rows()
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(sorted(rows.values()), [15, 17, 26, 42])
+
+class TestRowView(RankMatrixTest):
+
+    def test_view(self):
+        view = self.matrix.view([99, 0, 50])
+        self.assertEqual(len(view), 3)
+        self.assertEqual(list(view), [eftd.TN_IRV_100[99], eftd.TN_IRV_100[0], eftd.TN_IRV_100[50]])
+        self.assertEqual(view.row(1).tolist(), list(self.matrix.row(0)))
+        self.assertRaises(BufferError, self.matrix.append, eftd.TN_IRV_100[0])
+        view.release()
+        self.matrix.append(eftd.TN_IRV_100[0])
+
+class TestWeightedRankMatrix(RankMatrixTest):
+
+    def setUp(self):
+        RankMatrixTest.setUp(self)
+        self.weighted = rankmatrix.RankMatrix(4)
+        for ids, weight in self.matrix.count_rows().items():
+            self.weighted.append(self.matrix.decode(ids), weight)
+
+    def test_weighted(self):
+        self.assertTrue(self.weighted.weighted)
+        self.assertEqual(self.weighted.rows, 4)
+        self.assertEqual(len(self.weighted), 100)
+        self.assertEqual(list(self.weighted), eftd.TN_IRV_100)
+
+    def test_weighted_tally(self):
+        self.assertEqual(self.weighted.tally(0), self.matrix.tally(0))
+        self.assertEqual(self.weighted.tally(3), self.matrix.tally(3))
+        self.assertEqual(self.weighted.tally(), self.matrix.tally())
+        self.assertEqual(self.weighted.count_rows(), self.matrix.count_rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import logging
 import unittest
 
 import electionfraud.testdata as eftd
+import electionfraud.rankmatrix as rankmatrix
 import electionfraud.redist as redist
 
 logging.basicConfig(level=logging.DEBUG)
@@ -41,6 +42,45 @@ class TestNthSubset(RedistributorTest):
         self.assertEqual(len(eftd.FOOD_STV_20), len(redistributed))
         self.assertNotEqual(eftd.FOOD_STV_20, redistributed)
 
+    def test_wrap(self):
+        rd = redist.NthSubset(range(20), 4, wrap=True)
+        redistributed = [x for x in rd]
+        self.assertEqual(redistributed, [3, 7, 11, 15, 19, 4, 8, 12, 16, 0, 5, 9, 13, 17, 1, 6, 10, 14, 18, 2])
+        rd = redist.NthSubset(range(20), self.n, wrap=True)
+        self.assertEqual([x for x in rd], [6, 13, 0, 7, 14, 1, 8, 15, 2, 9, 16, 3, 10, 17, 4, 11, 18, 5, 12, 19])
+
+    def test_trace(self):
+        seen = list()
+        rd = redist.NthSubset(range(20), self.n, trace=lambda k, index: seen.append((k, index)))
+        redistributed = [x for x in rd]
+        self.assertEqual(seen, list(enumerate(redistributed)))
+        with self.assertLogs('electionfraud.redist', level='DEBUG'):
+            [x for x in redist.Cincinnati(range(20), trace=redist.debug_trace)]
+
+    def test_indices(self):
+        for size in (0, 1, 19, 20, 21, 77):
+            for n in (2, 3, 4, 7, 11, 30):
+                rd = redist.NthSubset(range(size), n, wrap=True)
+                traced = redist.NthSubset(range(size), n, wrap=True, trace=lambda k, index: None)
+                self.assertEqual(list(rd.indices()), [x for x in traced])
+        self.assertEqual(redist.Identity(eftd.FOOD_STV_20).indices().tolist(), list(range(20)))
+
+    def test_view(self):
+        matrix = rankmatrix.RankMatrix.from_responses(eftd.FOOD_STV_20)
+        rd = redist.NthSubset(matrix, self.n)
+        view = rd.view(matrix)
+        self.assertEqual(list(view), [x for x in redist.NthSubset(eftd.FOOD_STV_20, self.n)])
+        self.assertIs(view.row(0).obj, matrix.ranks)
+        pile = list(range(6, 18))
+        view = redist.Cincinnati(pile, wrap=True).view(matrix)
+        self.assertEqual(list(view), [eftd.FOOD_STV_20[x] for x in redist.Cincinnati(pile, wrap=True)])
+        view.release()
+        view = redist.HareRandom(matrix, seed=1).view(matrix)
+        self.assertEqual(list(view), [x for x in redist.HareRandom(eftd.FOOD_STV_20, seed=1)])
+        self.assertIs(view.row(0).obj, matrix.ranks)
+        view = redist.HareRandom(pile, seed=1).view(matrix)
+        self.assertEqual(list(view), [eftd.FOOD_STV_20[x] for x in redist.HareRandom(pile, seed=1)])
+
 class TestCincinnati(RedistributorTest):
 
     def test_cincy_divisor(self):
@@ -56,6 +96,12 @@ class TestCincinnati(RedistributorTest):
         redistributed = [x for x in rd]
         self.assertEqual(len(eftd.FOOD_STV_20), len(redistributed))
         self.assertNotEqual(eftd.FOOD_STV_20, redistributed)
+
+    def test_cincy_wrap(self):
+        rd = redist.Cincinnati(range(33), wrap=True)
+        redistributed = [x for x in rd]
+        self.assertEqual(sorted(redistributed), list(range(33)))
+        self.assertEqual(redistributed[0:4], [10, 21, 32, 11])
         
 class TestHareRandom(RedistributorTest):
 
@@ -73,6 +119,19 @@ class TestHareRandom(RedistributorTest):
             shuffles.append(shuffle)
         for i in range(tedium - 1):
             self.assertNotEqual(shuffles[i], shuffles[i + 1])
+
+    def test_hare_permutation(self):
+        rd = redist.HareRandom(range(1000))
+        self.assertEqual(sorted(rd), list(range(1000)))
+        self.assertEqual(sorted(rd), list(range(1000)))
+
+    def test_hare_seed(self):
+        rd = redist.HareRandom(eftd.FOOD_STV_20, seed=2011)
+        shuffle = [x for x in rd]
+        self.assertEqual([x for x in rd], shuffle)
+        self.assertEqual([x for x in redist.HareRandom(eftd.FOOD_STV_20, seed=2011)], shuffle)
+        self.assertEqual(list(rd.order()), list(redist.HareRandom(range(20), 2011).order()))
+        self.assertEqual(rd.indices(), rd.order())
         
 
 
@@ -1,8 +1,11 @@
 # -*- python -*-
 
+import itertools
 import unittest
 
 import electionfraud.testdata as eftd
+import electionfraud.rankmatrix as rankmatrix
+from electionfraud.fraud import Choice
 
 import electionfraud.responseformat.choose as choose
 import electionfraud.responseformat.exception as rfx
@@ -126,6 +129,31 @@ class TestPairwise(ResponseFormatTest):
         responses = [response, esnopser]
         self.assertRaises(rfx.MakeUpYourMind, self.rf.validate, responses, self.field)     
 
+    def test_first_problem(self):
+        memphis, nashville, chattanooga, _ = eftd.TENNESSEE.keys()
+        responses = [(memphis, nashville), (chattanooga, memphis), (nashville, memphis), (memphis, nashville)]
+        self.assertRaises(rfx.MakeUpYourMind, self.rf.validate, responses, self.field)
+        responses = [(memphis, nashville), (chattanooga, memphis), (memphis, nashville), (nashville, memphis)]
+        self.assertRaises(rfx.DuplicateChoice, self.rf.validate, responses, self.field)
+
+    def test_no_state(self):
+        response = [tuple(list(eftd.TENNESSEE.keys())[0:2])]
+        for voter in range(3):
+            self.assertIsNone(self.rf.validate(response, self.field))
+
+    def test_invalid_choice(self):
+        memphis = list(eftd.TENNESSEE.keys())[0]
+        self.assertRaises(rfx.InvalidChoice, self.rf.validate, [(memphis, eftd.E)], self.field)
+        self.assertIsNone(self.rf.validate([(memphis, eftd.E)], None))
+
+    def test_batch(self):
+        memphis, nashville, chattanooga, _ = eftd.TENNESSEE.keys()
+        responses = [[(memphis, nashville)], [(memphis, nashville)], [(memphis, memphis)],
+                     [(memphis, nashville), (nashville, memphis)], [memphis], [(memphis, nashville, chattanooga)]]
+        codes = list(self.rf.validate_batch(responses, self.field))
+        self.assertEqual(codes, [0, 0, rfx.SelfPair.code, rfx.MakeUpYourMind.code,
+                                 rfx.ResponseException.code, rfx.ResponseException.code])
+
 class TestAllPossiblePairwise(ResponseFormatTest):
 
     def setUp(self):
@@ -145,5 +173,69 @@ class TestAllPossiblePairwise(ResponseFormatTest):
             deleted.append(choices.pop(0))
         self.assertIsNone(self.rf.validate(responses, self.field))
 
+    def test_forty(self):
+        field = [Choice('Candidate %d' % (x)) for x in range(40)]
+        responses = list(itertools.combinations(field, 2))
+        self.assertIsNone(self.rf.validate(responses, set(field)))
+        responses[7] = responses[7][::-1]
+        self.assertIsNone(self.rf.validate(responses, set(field)))
+        responses[8] = responses[7][::-1]
+        self.assertRaises(rfx.MakeUpYourMind, self.rf.validate, responses, set(field))
+        self.assertRaises(rfx.WrongNumberOfChoices, self.rf.validate, responses[1:], set(field))
+        responses[8] = (field[0], field[0])
+        self.assertRaises(rfx.SelfPair, self.rf.validate, responses, set(field))
+
+class TestValidateBatch(ResponseFormatTest):
+
+    def setUp(self):
+        ResponseFormatTest.setUp(self)
+        memphis, nashville, chattanooga, knoxville = eftd.TENNESSEE.keys()
+        self.responses = [[memphis, nashville], [knoxville, knoxville], [memphis, nashville],
+                          [chattanooga, eftd.E], [], [nashville, chattanooga, knoxville, memphis]]
+
+    def assertBatch(self, rf, responses, field):
+        expected = [rf.reason(x, field) for x in responses]
+        self.assertEqual(list(rf.validate_batch(responses, field)), expected)
+        return expected
+
+    def test_codes(self):
+        rf = rank.RankNoMoreThanInOrderOfPreference(3)
+        codes = self.assertBatch(rf, self.responses, self.field)
+        self.assertEqual(codes, [0, rfx.DuplicateChoice.code, 0, rfx.InvalidChoice.code, 0, rfx.WrongNumberOfChoices.code])
+        self.assertIs(rfx.reason(codes[1]), rfx.DuplicateChoice)
+        self.assertIsNone(rfx.reason(0))
+
+    def test_matrix(self):
+        matrix = rankmatrix.RankMatrix.from_responses(self.responses)
+        for rf in (rank.RankInOrderOfPreference(), rank.RankAllInOrderOfPreference(), rank.RankNoMoreThanInOrderOfPreference(2)):
+            self.assertEqual(list(rf.validate_batch(matrix, self.field)), self.assertBatch(rf, self.responses, self.field))
+        rf = choose.ChooseNoMoreThan(2)
+        expected = [rf.reason(set(x), self.field) for x in self.responses]
+        self.assertEqual(list(rf.validate_batch(matrix, self.field)), expected)
+        self.assertEqual(list(rf.validate_batch(self.responses, self.field)), [rfx.ResponseException.code] * 6)
+
+    def test_empty_matrix(self):
+        rf = rank.RankAllInOrderOfPreference()
+        matrix = rankmatrix.RankMatrix.from_responses([[], []])
+        self.assertEqual(list(rf.validate_batch(matrix, self.field)), [rfx.WrongNumberOfChoices.code] * 2)
+
+    def test_ratings(self):
+        rf = rate.Ratings(5)
+        memphis, nashville, _, _ = eftd.TENNESSEE.keys()
+        responses = [[(memphis, 5), (nashville, 0)], [(memphis, 6)], [(memphis, 1), (memphis, 2)],
+                     [(memphis, 'five')], [(eftd.E, 1)], [(memphis,)]]
+        codes = self.assertBatch(rf, responses, self.field)
+        self.assertEqual(codes, [0, rfx.OverMaximumRating.code, rfx.DuplicateChoice.code,
+                                 rfx.NonIntegerRating.code, rfx.InvalidChoice.code, rfx.ResponseException.code])
+
+    def test_equal_but_not_identical(self):
+        # 1.0 == 1, but only the integer is a valid rating
+        rf = rate.Ratings(5)
+        memphis = list(eftd.TENNESSEE.keys())[0]
+        responses = [[(memphis, 1)], [(memphis, 1.0)], [(memphis, True)], [(memphis, 1)]]
+        codes = self.assertBatch(rf, responses, self.field)
+        self.assertEqual(codes[0:2], [0, rfx.NonIntegerRating.code])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,48 @@
+# -*- python -*-
+
+import random
+import unittest
+
+import electionfraud.rng as efrng
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_seed(self):
+        x = efrng.generator(42)
+        y = efrng.generator(42)
+        self.assertEqual([x.random() for i in range(5)], [y.random() for i in range(5)])
+
+    def test_passthrough(self):
+        x = random.Random(1)
+        self.assertIs(efrng.generator(x), x)
+
+class TestSubstreams(unittest.TestCase):
+
+    def test_reproducible(self):
+        x = efrng.substream('recount', 3)
+        y = efrng.substream('recount', 3)
+        self.assertEqual(x.getrandbits(64), y.getrandbits(64))
+
+    def test_independent(self):
+        streams = efrng.spawn(7, 4)
+        draws = [x.getrandbits(64) for x in streams]
+        self.assertEqual(len(set(draws)), 4)
+        self.assertEqual(draws, [x.getrandbits(64) for x in efrng.spawn(7, 4)])
+
+    def test_from_generator(self):
+        x = efrng.spawn(random.Random(5), 2)
+        y = efrng.spawn(random.Random(5), 2)
+        self.assertEqual(x[1].random(), y[1].random())
+
+class TestPermutation(unittest.TestCase):
+
+    def test_permutation(self):
+        order = efrng.permutation(1000, efrng.generator(1))
+        self.assertEqual(sorted(order), list(range(1000)))
+        self.assertEqual(order, efrng.permutation(1000, efrng.generator(1)))
+        self.assertNotEqual(order, efrng.permutation(1000, efrng.generator(2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# -*- python -*-
+
+import os
+import tempfile
+import unittest
+
+import electionfraud.testdata as eftd
+import electionfraud.stream as stream
+
+import electionfraud.countmethod.bucklin as bucklin
+import electionfraud.countmethod.fptp as fptp
+import electionfraud.countmethod.irv as irv
+
+
+class StreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.names = {str(x): x for x in eftd.TENNESSEE.keys()}
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            for response in eftd.TN_IRV_100:
+                f.write(','.join(str(x) for x in response) + '\n')
+        self.ballots = stream.lines(self.path, self.decode, hint=256)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def decode(self, line):
+        return [self.names[x] for x in line.rstrip('\n').split(',')]
+
+class TestBallotStream(StreamTest):
+
+    def test_replay(self):
+        self.assertEqual(list(self.ballots), eftd.TN_IRV_100)
+        self.assertEqual(list(self.ballots), eftd.TN_IRV_100)
+
+    def test_fptp_generator(self):
+        cm = fptp.FirstPastThePost()
+        cm.count(x[0:1] for x in stream.read_lines(self.path, self.decode))
+        self.assertEqual(cm.results, eftd.TENNESSEE)
+        self.assertEqual(cm.residue, 100)
+
+    def test_irv_stream(self):
+        cm = irv.InstantRunoffVoting(aggregate=True)
+        cm.count(self.ballots)
+        expected = irv.InstantRunoffVoting()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.residue, expected.residue)
+
+    def test_bucklin_stream(self):
+        cm = bucklin.Bucklin()
+        cm.count(self.ballots)
+        expected = bucklin.Bucklin()
+        expected.count(eftd.TN_IRV_100)
+        self.assertEqual(cm.residue, expected.residue)
+        self.assertEqual(len(cm.residue), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()